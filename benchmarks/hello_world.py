@@ -0,0 +1,44 @@
+import asyncio
+import time
+
+from jackie.router import Router
+from jackie.http import Response
+
+
+app = Router()
+
+
+@app.get('/')
+async def hello_world(request):
+    return Response(text='Hello, World!')
+
+
+SCOPE = {
+    'type': 'http',
+    'method': 'GET',
+    'path': '/',
+    'query_string': b'',
+    'headers': [],
+}
+
+
+async def receive():
+    return {'type': 'http.request', 'body': b'', 'more_body': False}
+
+
+async def send(message):
+    pass
+
+
+async def benchmark(requests):
+    start = time.perf_counter()
+    for _ in range(requests):
+        await app(SCOPE, receive, send)
+    return requests / (time.perf_counter() - start)
+
+
+if __name__ == '__main__':
+    loop = asyncio.new_event_loop()
+    loop.run_until_complete(benchmark(1000))
+    rate = max(loop.run_until_complete(benchmark(20000)) for _ in range(3))
+    print(f'{rate:.0f} requests/sec')
@@ -0,0 +1,106 @@
+from collections.abc import MutableMapping
+from itertools import chain
+import timeit
+import tracemalloc
+
+from jackie.multidict import MultiDict
+
+
+class ListMultiDict(MutableMapping):
+    # The previous implementation that stores a list for every key, kept here
+    # to compare against.
+
+    def __init__(self, items=[], **kwargs):
+        if isinstance(items, ListMultiDict):
+            items = items.allitems()
+        elif isinstance(items, dict):
+            items = items.items()
+        if kwargs:
+            items = chain(items, kwargs.items())
+        values = {}
+        for key, value in items:
+            key = self._clean_key(key)
+            value = self._clean_value(value)
+            values.setdefault(key, []).append(value)
+        self._values = values
+
+    def __getitem__(self, key):
+        key = self._clean_key(key)
+        return self._values[key][-1]
+
+    def __setitem__(self, key, value):
+        key = self._clean_key(key)
+        value = self._clean_value(value)
+        self._values[key] = [value]
+
+    def __delitem__(self, key):
+        key = self._clean_key(key)
+        del self._values[key]
+
+    def __len__(self):
+        return len(self._values)
+
+    def __iter__(self):
+        return iter(self._values)
+
+    def getlist(self, key):
+        key = self._clean_key(key)
+        try:
+            values = self._values[key]
+        except KeyError:
+            return []
+        else:
+            return list(values)
+
+    def allitems(self):
+        for key, values in self._values.items():
+            for value in values:
+                yield key, value
+
+    def _clean_key(self, key):
+        return key
+
+    def _clean_value(self, value):
+        return value
+
+
+ITEMS = [
+    ('query', [
+        ('page', '2'), ('per_page', '50'), ('sort', 'name'),
+        ('order', 'asc'), ('q', 'jackie'),
+    ]),
+    ('form', [(f'field{i}', f'value{i}') for i in range(20)]),
+    ('repeated', [('tag', f'tag{i}') for i in range(20)]),
+]
+
+
+def memory(cls, items, count=1000):
+    tracemalloc.start()
+    start, _ = tracemalloc.get_traced_memory()
+    instances = [cls(items) for _ in range(count)]
+    end, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del instances
+    return (end - start) / count
+
+
+def throughput(cls, items):
+    def run():
+        multidict = cls(items)
+        for key, _ in items:
+            multidict[key]
+        multidict.getlist(items[0][0])
+        list(multidict.allitems())
+    timer = timeit.Timer(run)
+    number, _ = timer.autorange()
+    return number / min(timer.repeat(5, number))
+
+
+if __name__ == '__main__':
+    for name, items in ITEMS:
+        for cls in [ListMultiDict, MultiDict]:
+            print(
+                f'{name:8} {cls.__name__:13}: '
+                f'{memory(cls, items):8.0f} bytes, '
+                f'{throughput(cls, items):8.0f} ops/sec'
+            )
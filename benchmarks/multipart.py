@@ -0,0 +1,73 @@
+import asyncio
+import os
+import sys
+import time
+
+from jackie import multipart
+
+
+SIZES = [
+    ('1KB', 1024),
+    ('100KB', 100 * 1024),
+    ('10MB', 10 * 1024 * 1024),
+    ('100MB', 100 * 1024 * 1024),
+]
+
+
+def binary_content(size):
+    return os.urandom(size)
+
+
+def text_content(size):
+    line = b'The quick brown fox jumps over the lazy dog.\n'
+    return (line * (size // len(line) + 1))[:size]
+
+
+async def get_body(content):
+    data = {
+        'file': multipart.File('file', 'application/octet-stream', content),
+    }
+    chunks = []
+    async for chunk in multipart.serialize(data, 'boundary'):
+        chunks.append(chunk)
+    return b''.join(chunks)
+
+
+def benchmark_parse(body):
+    start = time.perf_counter()
+    multipart.parse(body, 'boundary')
+    return time.perf_counter() - start
+
+
+async def benchmark_parse_stream(body, chunk_size=65536):
+    chunks = [
+        body[index:index + chunk_size]
+        for index in range(0, len(body), chunk_size)
+    ]
+    start = time.perf_counter()
+    await multipart.parse_stream(chunks, 'boundary')
+    return time.perf_counter() - start
+
+
+if __name__ == '__main__':
+    max_size = int(sys.argv[1]) if len(sys.argv) > 1 else SIZES[-1][1]
+    loop = asyncio.new_event_loop()
+    contents = [('binary', binary_content), ('text', text_content)]
+    for kind, get_content in contents:
+        for name, size in SIZES:
+            if size > max_size:
+                continue
+            body = loop.run_until_complete(get_body(get_content(size)))
+            repeat = max(1, min(1000, 10 * 1024 * 1024 // size))
+            parse_time = min(
+                benchmark_parse(body) for _ in range(repeat)
+            )
+            stream_time = min(
+                loop.run_until_complete(benchmark_parse_stream(body))
+                for _ in range(repeat)
+            )
+            print(
+                f'{kind:6} {name:>5}: '
+                f'parse {size / parse_time / 1024 / 1024:8.1f} MB/s, '
+                f'parse_stream {size / stream_time / 1024 / 1024:8.1f} MB/s'
+            )
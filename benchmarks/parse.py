@@ -0,0 +1,65 @@
+import timeit
+
+from jackie.parse import (
+    cache, lex, parse_content_type, parse_cookies, parse_set_cookie,
+    parse_token,
+)
+
+
+HEADERS = [
+    ('content type', parse_content_type, [
+        ('typical', 'application/json; charset=UTF-8'),
+        ('boundary', (
+            'multipart/form-data; '
+            'boundary=----------------0123456789abcdef0123456789abcdef'
+        )),
+        ('quoted', 'text/plain; charset="utf-8"; format="flowed \\" x"'),
+        ('many params', 'text/plain' + ''.join(
+            f'; param{i}=value{i}' for i in range(100)
+        )),
+    ]),
+    ('cookies', parse_cookies, [
+        ('typical', 'sessionid=38afes7a8; csrftoken=abcdef0123456789'),
+        ('many', '; '.join(f'cookie{i}=value{i}' for i in range(50))),
+        ('long value', 'token="' + 'x' * 4096 + '"'),
+        ('escaped', 'token="' + '\\"' * 1024 + '"'),
+    ]),
+    ('set cookie', parse_set_cookie, [
+        ('typical', 'sessionid=38afes7a8; Path=/; HttpOnly; SameSite=Lax'),
+        ('expires', (
+            'id=a3fWa; Expires=Wed, 21 Oct 2015 07:28:00 GMT; Secure; '
+            'Domain=example.com; Max-Age=3600'
+        )),
+        ('many params', 'id=a3fWa' + '; Secure' * 100),
+    ]),
+]
+
+
+def parse_generic(parse, content):
+    content = list(lex(content)), 0, frozenset()
+    content, result = parse(content)
+    parse_token(content, 'end')
+    return result
+
+
+def benchmark(func, *args):
+    timer = timeit.Timer(lambda: func(*args))
+    number, _ = timer.autorange()
+    return min(timer.repeat(5, number)) / number
+
+
+if __name__ == '__main__':
+    for header, parse, values in HEADERS:
+        for name, value in values:
+            fast_time = benchmark(parse, value)
+            generic_time = benchmark(parse_generic, parse, value)
+            cache.configure(size=1024, max_length=len(value))
+            cached_time = benchmark(parse, value)
+            cache.configure(size=0)
+            print(
+                f'{header:12} {name:12}: '
+                f'parse {fast_time * 1e6:8.2f} us, '
+                f'generic {generic_time * 1e6:8.2f} us, '
+                f'cached {cached_time * 1e6:8.2f} us, '
+                f'{generic_time / fast_time:5.1f}x'
+            )
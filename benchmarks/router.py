@@ -0,0 +1,35 @@
+import timeit
+
+from jackie.http import Response
+from jackie.router import Router
+
+
+async def view(request, x):
+    return Response(text=str(x))
+
+
+def build(routes):
+    router = Router()
+    for i in range(routes):
+        router.get(f'/s{i}/<x:int>/', view)
+    return router.compile()
+
+
+def benchmark(router, path):
+    timer = timeit.Timer(lambda: router._get_view('GET', path))
+    number, _ = timer.autorange()
+    return min(timer.repeat(5, number)) / number
+
+
+if __name__ == '__main__':
+    for routes in [10, 100, 1000]:
+        router = build(routes)
+        first = benchmark(router, '/s0/1/')
+        last = benchmark(router, f'/s{routes - 1}/1/')
+        not_found = benchmark(router, '/unknown/1/')
+        print(
+            f'{routes:5} routes: '
+            f'first {first * 1e6:8.2f} us, '
+            f'last {last * 1e6:8.2f} us, '
+            f'not found {not_found * 1e6:8.2f} us'
+        )
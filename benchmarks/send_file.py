@@ -0,0 +1,56 @@
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+from jackie.http import Response
+from jackie.http.stream import SendFile
+from jackie.http.wrappers import send_response
+
+
+SCOPE = {
+    'type': 'http',
+    'method': 'GET',
+    'path': '/',
+    'query_string': b'',
+    'headers': [],
+}
+
+
+async def send(message):
+    pass
+
+
+class FixedChunkSendFile(SendFile):
+
+    def __init__(self, *args, chunk_size, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.chunk_size = chunk_size
+
+    async def chunks(self):
+        async for chunk in super().chunks(chunk_size=self.chunk_size):
+            yield chunk
+
+
+async def benchmark(send_file):
+    start = time.perf_counter()
+    await send_response(Response(body=[send_file]), SCOPE, send)
+    return time.perf_counter() - start
+
+
+if __name__ == '__main__':
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else 100 * 1024 * 1024
+    loop = asyncio.new_event_loop()
+    with tempfile.NamedTemporaryFile() as f:
+        f.write(os.urandom(size))
+        f.flush()
+        for name, send_file in [
+            ('4KB chunks', FixedChunkSendFile(f.name, chunk_size=4096)),
+            ('adaptive chunks', SendFile(f.name)),
+        ]:
+            duration = min(
+                loop.run_until_complete(benchmark(send_file))
+                for _ in range(3)
+            )
+            print(f'{name:>15}: {size / duration / 1024 / 1024:8.1f} MB/s')
@@ -0,0 +1,57 @@
+import asyncio
+import tempfile
+import time
+
+from jackie.router import Router
+from jackie.http import Response
+from jackie.static import Static
+
+
+CONTENT = b'x' * 1024
+
+
+async def receive():
+    return {'type': 'http.request', 'body': b'', 'more_body': False}
+
+
+async def send(message):
+    pass
+
+
+async def benchmark(app, path, requests):
+    scope = {
+        'type': 'http',
+        'method': 'GET',
+        'path': path,
+        'query_string': b'',
+        'headers': [],
+    }
+    start = time.perf_counter()
+    for _ in range(requests):
+        await app(scope, receive, send)
+    return requests / (time.perf_counter() - start)
+
+
+if __name__ == '__main__':
+    with tempfile.TemporaryDirectory() as directory:
+        with open(f'{directory}/file.txt', 'wb') as f:
+            f.write(CONTENT)
+
+        app = Router(cache_size=1024)
+        app.include('/static', Static(directory))
+
+        @app.get('/memory')
+        async def memory(request):
+            return Response(body=CONTENT, content_type='text/plain')
+
+        loop = asyncio.new_event_loop()
+        for name, path in [
+            ('in-memory response', '/memory'),
+            ('static file', '/static/file.txt'),
+        ]:
+            loop.run_until_complete(benchmark(app, path, 1000))
+            rate = max(
+                loop.run_until_complete(benchmark(app, path, 20000))
+                for _ in range(3)
+            )
+            print(f'{name:>18}: {rate:.0f} requests/sec')
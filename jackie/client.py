@@ -31,6 +31,7 @@ class Client:
         now = datetime.now().astimezone(timezone.utc)
         for cookie in headers.getlist('Set-Cookie'):
             name, value, params = parse_set_cookie(cookie)
+            params = {**params}
             try:
                 params['expires'] = (
                     now + timedelta(seconds=params.pop('max_age'))
@@ -0,0 +1,32 @@
+import json
+
+
+class JSONCodec:
+
+    def __init__(self, *, dumps=json.dumps, loads=json.loads):
+        self.configure(dumps=dumps, loads=loads)
+
+    def configure(self, *, dumps=json.dumps, loads=json.loads):
+        # dumps can return either str or bytes, loads has to accept both.
+        self.dumps = dumps
+        self.loads = loads
+
+    def encode(self, value):
+        data = self.dumps(value)
+        if isinstance(data, str):
+            data = data.encode()
+        return data
+
+    def encode_text(self, value):
+        data = self.dumps(value)
+        if isinstance(data, bytes):
+            data = data.decode()
+        return data
+
+    def decode(self, data):
+        return self.loads(data)
+
+
+# The codec that is used for all JSON in jackie, by configuring this codec a
+# faster JSON library can be used.
+json_codec = JSONCodec()
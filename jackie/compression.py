@@ -0,0 +1,230 @@
+import asyncio
+import functools
+import zlib
+
+from .http import Response
+from .multidict import Headers
+from .parse import parse_accept_encoding
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover
+    zstandard = None
+
+
+# Responses smaller than this amount of bytes are not compressed.
+MIN_SIZE = 1024
+# Chunks of at least this amount of bytes are compressed in a thread pool so
+# that the event loop is not blocked.
+THREAD_SIZE = 65536
+
+COMPRESSIBLE_TYPES = {
+    'application/javascript',
+    'application/json',
+    'application/xml',
+    'image/svg+xml',
+}
+# Event streams are left alone since the compressor would hold back events.
+INCOMPRESSIBLE_TYPES = {
+    'text/event-stream',
+}
+
+
+# Compressors flush their output after every chunk of a streaming body so that
+# the client receives it without waiting for the compressor's buffer to fill.
+class ZlibCompressor:
+
+    def __init__(self, wbits):
+        self._compressor = zlib.compressobj(6, zlib.DEFLATED, wbits)
+
+    def compress(self, data):
+        return self._compressor.compress(data)
+
+    def flush(self):
+        return self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self):
+        return self._compressor.flush()
+
+
+class BrotliCompressor:
+
+    def __init__(self):
+        self._compressor = brotli.Compressor(quality=4)
+
+    def compress(self, data):
+        return self._compressor.process(data)
+
+    def flush(self):
+        return self._compressor.flush()
+
+    def finish(self):
+        return self._compressor.finish()
+
+
+class ZstdCompressor:
+
+    def __init__(self):
+        self._compressor = zstandard.ZstdCompressor(level=3).compressobj()
+
+    def compress(self, data):
+        return self._compressor.compress(data)
+
+    def flush(self):
+        return self._compressor.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+
+    def finish(self):
+        return self._compressor.flush()
+
+
+# Encodings in order of preference, the compressor is None when the encoding
+# is not available.
+COMPRESSORS = {
+    'br': BrotliCompressor if brotli is not None else None,
+    'zstd': ZstdCompressor if zstandard is not None else None,
+    'gzip': functools.partial(ZlibCompressor, 16 + zlib.MAX_WBITS),
+    'deflate': functools.partial(ZlibCompressor, zlib.MAX_WBITS),
+}
+
+
+def is_compressible(response):
+    if (
+        not 200 <= response.status < 300 or
+        response.status in (204, 206) or
+        'Content-Encoding' in response.headers or
+        response._send_file is not None
+    ):
+        return False
+    try:
+        content_type = response.content_type
+    except ValueError:
+        return False
+    if content_type is None or content_type in INCOMPRESSIBLE_TYPES:
+        return False
+    return (
+        content_type.startswith('text/') or
+        content_type in COMPRESSIBLE_TYPES or
+        content_type.endswith('+json') or
+        content_type.endswith('+xml')
+    )
+
+
+def get_encoding(accept_encoding, encodings):
+    try:
+        accepted = parse_accept_encoding(accept_encoding or '')
+    except ValueError:
+        return None
+    encoding = None
+    quality = 0
+    for name in encodings:
+        if COMPRESSORS.get(name) is None:
+            continue
+        name_quality = accepted.get(name, accepted.get('*', 0))
+        if name_quality > quality:
+            encoding = name
+            quality = name_quality
+    return encoding
+
+
+def compress_chunk(compressor, chunk, flush):
+    data = compressor.compress(chunk)
+    if flush:
+        data += compressor.flush()
+    return data
+
+
+async def compress_chunks(chunks, compressor, thread_size, flush):
+    loop = asyncio.get_event_loop()
+    async for chunk in chunks:
+        if not chunk:
+            continue
+        if len(chunk) >= thread_size:
+            data = await loop.run_in_executor(
+                None, compress_chunk, compressor, chunk, flush,
+            )
+        else:
+            data = compress_chunk(compressor, chunk, flush)
+        if data:
+            yield data
+    data = compressor.finish()
+    if data:
+        yield data
+
+
+def replace_body(response, headers, body):
+    return Response(
+        status=response.status,
+        headers=headers,
+        body=body,
+        buffer_size=response.buffer_size,
+        buffer_delay=response.buffer_delay,
+    )
+
+
+def compress(
+    get_response=None, *, min_size=MIN_SIZE, thread_size=THREAD_SIZE,
+    encodings=tuple(COMPRESSORS),
+):
+    if get_response is None:
+        return functools.partial(
+            compress,
+            min_size=min_size,
+            thread_size=thread_size,
+            encodings=encodings,
+        )
+
+    async def view(request):
+        response = await get_response(request)
+        if not is_compressible(response):
+            return response
+
+        headers = Headers(response.headers)
+        vary = [
+            value.strip().lower()
+            for values in headers.getlist('Vary')
+            for value in values.split(',')
+        ]
+        if 'accept-encoding' not in vary and '*' not in vary:
+            headers.appendlist('Vary', 'Accept-Encoding')
+
+        encoding = get_encoding(
+            request.headers.get('Accept-Encoding'), encodings,
+        )
+        try:
+            content_length = int(headers['Content-Length'])
+        except (KeyError, ValueError):
+            content_length = None
+        # The size of a body that is in memory already is known without
+        # reading it, streaming bodies of unknown size are always compressed.
+        sequence = response._sequence
+        if (
+            content_length is None and
+            sequence is not None and
+            all(isinstance(chunk, bytes) for chunk in sequence)
+        ):
+            content_length = sum(len(chunk) for chunk in sequence)
+        if encoding is None or (
+            content_length is not None and content_length < min_size
+        ):
+            response.headers = headers
+            return response
+
+        headers['Content-Encoding'] = encoding
+        headers.pop('Content-Length', None)
+        # The compressed body is a different representation so it can not
+        # share a strong ETag with the uncompressed body.
+        etag = headers.get('ETag')
+        if etag is not None and not etag.startswith('W/'):
+            headers['ETag'] = 'W/' + etag
+
+        return replace_body(response, headers, compress_chunks(
+            response.chunks(cache=False), COMPRESSORS[encoding](),
+            thread_size, sequence is None,
+        ))
+
+    return view
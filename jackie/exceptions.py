@@ -0,0 +1,2 @@
+class LimitExceeded(ValueError):
+    pass
@@ -1,3 +1,4 @@
+from ..exceptions import LimitExceeded
 from .cookie import Cookie
 from .exceptions import Disconnect
 from .request import Request
@@ -11,6 +12,7 @@ __all__ = [
     'Cookie',
     'Disconnect',
     'jackie_to_asgi',
+    'LimitExceeded',
     'Request',
     'Response',
     'Socket',
@@ -1,9 +1,10 @@
-import json
 import mimetypes
+import urllib.parse
 
+from ..codec import json_codec
 from ..multidict import MultiDict, Headers
 from .. import multipart
-from ..parse import parse_cookies
+from ..parse import cached_parse, parse_cookies
 from .stream import Stream, SendFile
 
 
@@ -14,7 +15,7 @@ def form_body(body):
 
 
 def json_body(body):
-    body = json.dumps(body).encode()
+    body = json_codec.encode(body)
     return body, 'application/json; charset=UTF-8'
 
 
@@ -26,7 +27,7 @@ def text_body(body):
 def file_body(body):
     if isinstance(body, multipart.File):
         content_type = body._content_type
-        body = body.content
+        body = body.chunks()
     else:
         chunk = SendFile(body)
         content_type, _ = mimetypes.guess_type(chunk.path)
@@ -50,7 +51,8 @@ BODY_TYPES = {
 class Request(Stream):
 
     def __init__(
-        self, path='/', *, method='GET', query=[], headers=[], **kwargs,
+        self, path='/', *, method='GET', query=[], query_string=None,
+        headers=[], replayable=True, max_decompressed_size=None, **kwargs,
     ):
         body = None
         for key, get_body in BODY_TYPES.items():
@@ -64,20 +66,55 @@ class Request(Stream):
                 raise ValueError('multiple body types supplied')
         body, content_type = body or (b'', None)
 
-        super().__init__(body)
+        super().__init__(body, replayable=replayable)
+        if max_decompressed_size is not None:
+            self.max_decompressed_size = max_decompressed_size
         self.path = path
         self.method = method
-        self.query = MultiDict(query)
+        if query_string is None:
+            self.query = query
+        else:
+            # The query string is only parsed when the query is accessed.
+            self._query = None
+            self._query_string = query_string
         self.headers = Headers(headers, **kwargs)
         if content_type is not None:
             self.headers.setdefault('Content-Type', content_type)
 
         self.router = None
         self.view_name = None
+        self.view_params = {}
+
+    @property
+    def query(self):
+        if self._query is None:
+            self._query = MultiDict(urllib.parse.parse_qsl(
+                self._query_string.decode(),
+            ))
+        return self._query
+
+    @query.setter
+    def query(self, query):
+        self._query = MultiDict(query)
+        self._query_string = None
+
+    @property
+    def query_string(self):
+        # The original query string can only be used as long as the query has
+        # not been accessed, since it could have been changed since.
+        if self._query is None:
+            return self._query_string
+        return urllib.parse.urlencode(list(self._query.allitems())).encode()
 
     def _get_content_type(self):
         return self.headers.get('Content-Type')
 
+    def _get_content_encoding(self):
+        return self.headers.get('Content-Encoding')
+
     @property
     def cookies(self):
-        return parse_cookies(self.headers.get('Cookie', ''))
+        # A copy is returned so that changes do not end up in the cache.
+        return dict(cached_parse(
+            self._parse_cache, parse_cookies, self.headers.get('Cookie', ''),
+        ))
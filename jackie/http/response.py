@@ -1,15 +1,55 @@
+from collections import OrderedDict
 from datetime import datetime, timezone
-import json
 import mimetypes
+import os
+import time
 
+from ..codec import json_codec
 from ..multidict import Headers
 from .. import multipart
+from ..parse import parse_date, parse_range
+from ..serialize import serialize_date
 from .stream import Stream, SendFile
 from .cookie import Cookie
 
 
 EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
 
+# Stat results of files are reused for this many seconds so that files that
+# are requested often do not hit the filesystem on every request.
+STAT_CACHE_TTL = 1.0
+STAT_CACHE_SIZE = 1024
+STAT_CACHE = OrderedDict()
+# Range requests with more ranges than this after merging overlapping ranges
+# get the full response instead.
+MAX_RANGES = 16
+
+
+def stat_file(path):
+    now = time.monotonic()
+    try:
+        timestamp, stat = STAT_CACHE[path]
+    except KeyError:
+        pass
+    else:
+        if now - timestamp < STAT_CACHE_TTL:
+            STAT_CACHE.move_to_end(path)
+            return stat
+    stat = os.stat(path)
+    STAT_CACHE[path] = now, stat
+    STAT_CACHE.move_to_end(path)
+    if len(STAT_CACHE) > STAT_CACHE_SIZE:
+        STAT_CACHE.popitem(last=False)
+    return stat
+
+
+def get_validators(stat):
+    etag = f'"{stat.st_ino:x}-{stat.st_mtime_ns:x}-{stat.st_size:x}"'
+    last_modified = serialize_date(
+        datetime.fromtimestamp(int(stat.st_mtime), timezone.utc),
+    )
+    return etag, last_modified
+
 
 def form_body(body):
     boundary = multipart.generate_boundary()
@@ -19,7 +59,7 @@ def form_body(body):
 
 
 def json_body(body):
-    body = json.dumps(body).encode()
+    body = json_codec.encode(body)
     headers = {'Content-Type': 'application/json; charset=UTF-8'}
     return 200, body, headers
 
@@ -43,17 +83,23 @@ def redirect_body(body):
 
 
 def file_body(body):
+    headers = {}
     if isinstance(body, multipart.File):
         content_type = body._content_type
-        body = body.content
+        body = body.chunks()
     else:
         chunk = SendFile(body)
         content_type, _ = mimetypes.guess_type(chunk.path)
         body = [chunk]
-    if content_type is None:
-        headers = {}
-    else:
-        headers = {'Content-Type': content_type}
+        headers['Accept-Ranges'] = 'bytes'
+        try:
+            stat = stat_file(chunk.path)
+        except OSError:
+            pass
+        else:
+            headers['ETag'], headers['Last-Modified'] = get_validators(stat)
+    if content_type is not None:
+        headers['Content-Type'] = content_type
     return 200, body, headers
 
 
@@ -74,9 +120,16 @@ BODY_TYPES = {
 
 class Response(Stream):
 
+    # Small chunks are joined together into chunks of buffer_size bytes when
+    # the response is sent, this is disabled when buffer_size is 0. These can
+    # be changed on the class to change the default for all responses.
+    buffer_size = 0
+    buffer_delay = 0.01
+
     def __init__(
         self, *, status=None, content_type=None, headers=[], set_cookies=[],
-        unset_cookies=[], **kwargs,
+        unset_cookies=[], replayable=True, buffer_size=None, buffer_delay=None,
+        **kwargs,
     ):
         body = None
         for key, get_body in BODY_TYPES.items():
@@ -90,8 +143,23 @@ class Response(Stream):
                 raise ValueError('multiple body types supplied')
         default_status, body, default_headers = body or (200, b'', {})
 
-        super().__init__(body)
+        # Responses that consist of a single file can be turned into a
+        # partial response for range requests.
+        if (
+            isinstance(body, list) and
+            len(body) == 1 and
+            isinstance(body[0], SendFile)
+        ):
+            self._send_file = body[0]
+        else:
+            self._send_file = None
+
+        super().__init__(body, replayable=replayable)
         self.status = default_status if status is None else status
+        if buffer_size is not None:
+            self.buffer_size = buffer_size
+        if buffer_delay is not None:
+            self.buffer_delay = buffer_delay
         self.headers = Headers(headers, **kwargs)
         if content_type is not None:
             self.headers.setdefault('Content-Type', content_type)
@@ -109,3 +177,136 @@ class Response(Stream):
     @property
     def ok(self):
         return self.status < 400
+
+
+def get_ranges(ranges, size):
+    for start, end in ranges:
+        if start is None:
+            if end == 0:
+                continue
+            start = max(size - end, 0)
+            end = size - 1
+        elif start >= size:
+            continue
+        elif end is None or end >= size:
+            end = size - 1
+        yield start, end
+
+
+def merge_ranges(ranges):
+    # Overlapping and adjacent ranges are merged so that a request can not make
+    # us send the same bytes multiple times.
+    merged = []
+    for start, end in sorted(ranges):
+        if merged and start <= merged[-1][1] + 1:
+            merged[-1] = merged[-1][0], max(merged[-1][1], end)
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def range_response(response, range_header, if_range=None):
+    send_file = response._send_file
+    if response.status != 200 or send_file is None:
+        return response
+
+    # When the resource has changed since the client got its copy the full
+    # resource is sent instead.
+    if if_range is not None and if_range not in (
+        response.headers.get('ETag'),
+        response.headers.get('Last-Modified'),
+    ):
+        return response
+
+    try:
+        ranges = parse_range(range_header)
+    except ValueError:
+        return response
+
+    if send_file.size < 0:
+        size = stat_file(send_file.path).st_size - send_file.offset
+    else:
+        size = send_file.size
+    ranges = merge_ranges(get_ranges(ranges, size))
+    if len(ranges) > MAX_RANGES:
+        return response
+
+    headers = Headers(response.headers)
+    headers.pop('Content-Length', None)
+
+    if not ranges:
+        headers.pop('Content-Type', None)
+        headers['Content-Range'] = f'bytes */{size}'
+        return Response(status=416, headers=headers)
+
+    if len(ranges) == 1:
+        (start, end), = ranges
+        headers['Content-Range'] = f'bytes {start}-{end}/{size}'
+        return Response(status=206, headers=headers, body=[SendFile(
+            send_file.path,
+            offset=send_file.offset + start,
+            size=end - start + 1,
+        )])
+
+    boundary = multipart.generate_boundary()
+    content_type = headers.pop('Content-Type', None)
+    headers['Content-Type'] = f'multipart/byteranges; boundary={boundary}'
+    body = []
+    for start, end in ranges:
+        part_headers = f'--{boundary}\r\n'
+        if content_type is not None:
+            part_headers += f'Content-Type: {content_type}\r\n'
+        part_headers += f'Content-Range: bytes {start}-{end}/{size}\r\n\r\n'
+        body.append(part_headers.encode())
+        body.append(SendFile(
+            send_file.path,
+            offset=send_file.offset + start,
+            size=end - start + 1,
+        ))
+        body.append(b'\r\n')
+    body.append(f'--{boundary}--\r\n'.encode())
+    return Response(status=206, headers=headers, body=body)
+
+
+def strip_weak(etag):
+    if etag.startswith('W/'):
+        etag = etag[2:]
+    return etag
+
+
+def is_not_modified(response, request_headers):
+    etag = response.headers.get('ETag')
+    if_none_match = request_headers.get('If-None-Match')
+    if if_none_match is not None:
+        if etag is None:
+            return False
+        etags = {strip_weak(etag.strip()) for etag in if_none_match.split(',')}
+        return '*' in etags or strip_weak(etag) in etags
+
+    last_modified = response.headers.get('Last-Modified')
+    if_modified_since = request_headers.get('If-Modified-Since')
+    if last_modified is None or if_modified_since is None:
+        return False
+    try:
+        return parse_date(last_modified) <= parse_date(if_modified_since)
+    except ValueError:
+        return False
+
+
+def conditional_response(response, request_headers):
+    if response.status != 200:
+        return response
+
+    if is_not_modified(response, request_headers):
+        headers = Headers(response.headers)
+        for key in ['Content-Type', 'Content-Length', 'Accept-Ranges']:
+            headers.pop(key, None)
+        return Response(status=304, headers=headers)
+
+    range_header = request_headers.get('Range')
+    if range_header is not None:
+        return range_response(
+            response, range_header, request_headers.get('If-Range'),
+        )
+
+    return response
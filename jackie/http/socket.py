@@ -1,8 +1,9 @@
 from datetime import datetime, timezone
-import json
+import urllib.parse
 
+from ..codec import json_codec
 from ..multidict import MultiDict, Headers
-from ..parse import parse_cookies
+from ..parse import cached_parse, parse_cookies
 from .cookie import Cookie
 
 
@@ -14,12 +15,18 @@ class Socket:
     method = 'WEBSOCKET'
 
     def __init__(
-        self, path='/', *, accept, close, receive, send, query=[], headers=[],
-        **kwargs
+        self, path='/', *, accept, close, receive, send, query=[],
+        query_string=None, headers=[], **kwargs
     ):
         self.path = path
-        self.query = MultiDict(query)
+        if query_string is None:
+            self.query = query
+        else:
+            # The query string is only parsed when the query is accessed.
+            self._query = None
+            self._query_string = query_string
         self.headers = Headers(headers, **kwargs)
+        self._parse_cache = {}
 
         self._accept = accept
         self._close = close
@@ -28,10 +35,35 @@ class Socket:
 
         self.router = None
         self.view_name = None
+        self.view_params = {}
+
+    @property
+    def query(self):
+        if self._query is None:
+            self._query = MultiDict(urllib.parse.parse_qsl(
+                self._query_string.decode(),
+            ))
+        return self._query
+
+    @query.setter
+    def query(self, query):
+        self._query = MultiDict(query)
+        self._query_string = None
+
+    @property
+    def query_string(self):
+        # The original query string can only be used as long as the query has
+        # not been accessed, since it could have been changed since.
+        if self._query is None:
+            return self._query_string
+        return urllib.parse.urlencode(list(self._query.allitems())).encode()
 
     @property
     def cookies(self):
-        return parse_cookies(self.headers.get('Cookie', ''))
+        # A copy is returned so that changes do not end up in the cache.
+        return dict(cached_parse(
+            self._parse_cache, parse_cookies, self.headers.get('Cookie', ''),
+        ))
 
     async def accept(
         self, headers=[], set_cookies=[], unset_cookies=[], **kwargs,
@@ -59,7 +91,8 @@ class Socket:
         return message
 
     async def receive_json(self):
-        return json.loads(await self.receive_text())
+        # The codec accepts both str and bytes so the message is not converted.
+        return json_codec.decode(await self._receive())
 
     async def send_bytes(self, message):
         if not isinstance(message, bytes):
@@ -76,4 +109,4 @@ class Socket:
         return await self._send(message)
 
     async def send_json(self, message):
-        return await self.send_text(json.dumps(message))
+        return await self._send(json_codec.encode_text(message))
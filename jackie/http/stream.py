@@ -1,13 +1,15 @@
 from abc import ABC, abstractmethod
 import asyncio
-import json
 import os
 import urllib.parse
+import zlib
 
 import aiofiles
 
+from ..codec import json_codec
+from ..exceptions import LimitExceeded
 from ..multidict import MultiDict
-from ..parse import parse_content_type
+from ..parse import cached_parse, parse_content_type
 from .. import multipart
 
 
@@ -16,6 +18,140 @@ async def iterable_to_async_iterable(iterable):
         yield value
 
 
+async def limit_chunks(chunks, max_size):
+    size = 0
+    async for chunk in chunks:
+        size += len(chunk)
+        if size > max_size:
+            raise LimitExceeded(f'body exceeds max size of {max_size} bytes')
+        yield chunk
+
+
+# Compressed bodies are decompressed in pieces of at most this amount of bytes
+# so that a small chunk can not expand into a huge amount of memory at once.
+DECOMPRESS_CHUNK_SIZE = 65536
+# Decompressing a body that expands beyond this amount of bytes raises a
+# LimitExceeded to protect against zip bombs.
+MAX_DECOMPRESSED_SIZE = 64 * 1024 * 1024
+DECOMPRESS_WBITS = {
+    'gzip': 16 + zlib.MAX_WBITS,
+    'x-gzip': 16 + zlib.MAX_WBITS,
+    'deflate': zlib.MAX_WBITS,
+}
+
+
+async def decompress_chunks(chunks, encoding, max_size=None):
+    # Content codings are listed in the order in which they were applied so
+    # they are undone in reverse order.
+    names = [
+        name for name in (
+            name.strip().lower()
+            for name in reversed(encoding.split(','))
+        )
+        if name not in ('', 'identity')
+    ]
+    if not all(name in DECOMPRESS_WBITS for name in names):
+        # Bodies with an encoding that is not supported are passed on as
+        # they were received.
+        async for chunk in chunks:
+            yield chunk
+        return
+    for name in names:
+        chunks = _decompress_chunks(chunks, DECOMPRESS_WBITS[name])
+    if max_size is not None:
+        chunks = limit_chunks(chunks, max_size)
+    async for chunk in chunks:
+        yield chunk
+
+
+async def _decompress_chunks(chunks, wbits):
+    decompressor = zlib.decompressobj(wbits)
+    empty = True
+    try:
+        async for chunk in chunks:
+            if chunk:
+                empty = False
+            while chunk:
+                data = decompressor.decompress(chunk, DECOMPRESS_CHUNK_SIZE)
+                if decompressor.unused_data:
+                    raise ValueError(
+                        'invalid compressed body: data after end of stream'
+                    )
+                chunk = decompressor.unconsumed_tail
+                if data:
+                    yield data
+        data = decompressor.flush()
+    except zlib.error as e:
+        raise ValueError(f'invalid compressed body: {e}') from None
+    if data:
+        yield data
+    # An empty body is empty, whatever its encoding.
+    if not decompressor.eof and not empty:
+        raise ValueError('invalid compressed body: unexpected end of data')
+
+
+async def coalesce_chunks(chunks, size, delay):
+    # Joins small chunks together until they reach size bytes. When the next
+    # chunk takes longer than delay seconds the buffered chunks are flushed
+    # anyway so that streaming responses are not held back.
+    chunks = chunks.__aiter__()
+    buffer = []
+    buffer_size = 0
+    task = None
+    try:
+        while True:
+            try:
+                if buffer:
+                    task = asyncio.ensure_future(chunks.__anext__())
+                    done, _ = await asyncio.wait([task], timeout=delay)
+                    if not done:
+                        yield b''.join(buffer)
+                        buffer = []
+                        buffer_size = 0
+                    chunk = await task
+                    task = None
+                else:
+                    chunk = await chunks.__anext__()
+            except StopAsyncIteration:
+                break
+            if isinstance(chunk, SendFile) or (
+                not buffer and len(chunk) >= size
+            ):
+                if buffer:
+                    yield b''.join(buffer)
+                    buffer = []
+                    buffer_size = 0
+                yield chunk
+                continue
+            buffer.append(chunk)
+            buffer_size += len(chunk)
+            if buffer_size >= size:
+                yield b''.join(buffer)
+                buffer = []
+                buffer_size = 0
+        if buffer:
+            yield b''.join(buffer)
+    finally:
+        if task is not None:
+            task.cancel()
+
+
+async def expand_send_files(chunks):
+    async for chunk in chunks:
+        if isinstance(chunk, SendFile):
+            async for chunk in chunk.chunks():
+                yield chunk
+        else:
+            yield chunk
+
+
+# Files are read in chunks that start small so that small files and the start
+# of a response are sent quickly, the chunk size doubles after every chunk so
+# that big files need few reads.
+MIN_CHUNK_SIZE = 65536
+MAX_CHUNK_SIZE = 1024 * 1024
+
+
 class SendFile:
 
     def __init__(self, path, *, offset=0, size=-1):
@@ -23,13 +159,16 @@ class SendFile:
         self.offset = offset
         self.size = size
 
-    async def chunks(self, *, chunk_size=4096):
+    async def chunks(self, *, chunk_size=None):
         async with aiofiles.open(self.path, 'rb') as f:
             if self.offset != 0:
                 await f.seek(self.offset)
-            if chunk_size < 0:
+            if chunk_size is not None and chunk_size < 0:
                 yield await f.read(self.size)
                 return
+            adaptive = chunk_size is None
+            if adaptive:
+                chunk_size = MIN_CHUNK_SIZE
             size = self.size
             while size != 0:
                 chunk = await f.read(
@@ -39,54 +178,173 @@ class SendFile:
                     break
                 size -= len(chunk)
                 yield chunk
+                if adaptive:
+                    chunk_size = min(chunk_size * 2, MAX_CHUNK_SIZE)
 
 
 class Stream(ABC):
 
-    def __init__(self, chunks=b''):
+    max_decompressed_size = MAX_DECOMPRESSED_SIZE
+
+    def __init__(self, chunks=b'', *, replayable=True):
         if isinstance(chunks, bytes):
             chunks = [chunks]
+        # Chunks that are in memory already can be read again without caching
+        # them.
+        if isinstance(chunks, (list, tuple)):
+            self._sequence = chunks
+        else:
+            self._sequence = None
         if not hasattr(chunks, '__aiter__'):
             chunks = iterable_to_async_iterable(chunks)
-        self._cache = []
         self._chunks = chunks.__aiter__()
+        # Chunks are cached so that the stream can be consumed multiple times.
+        # When the stream is not replayable chunks are dropped from the cache
+        # once they have been consumed, _offset is the amount of chunks that
+        # have been dropped.
+        self._cache = []
+        self._offset = 0
+        self._consumed = False
+        self.replayable = replayable
+        self._done = False
+        self._error = None
+        # Only when multiple consumers wait for the same chunk futures are
+        # needed to wake up the consumers that are not fetching the chunk.
+        self._fetching = False
+        self._waiters = []
+        self._parse_cache = {}
+        # Multipart form data is not cached while it is parsed, so when the
+        # body can not be read again the parsed form is kept instead.
+        self._form = None
+
+    async def _fetch(self):
+        self._fetching = True
+        try:
+            chunk = await self._chunks.__anext__()
+        except StopAsyncIteration:
+            self._done = True
+        except asyncio.CancelledError:
+            # Cancelling the consumer that fetches also ends the underlying
+            # iterator, the other consumers should not take that for the end
+            # of the stream.
+            self._error = ValueError('reading the stream was cancelled')
+            raise
+        except Exception as e:
+            self._error = e
+        else:
+            self._cache.append(chunk)
+        finally:
+            self._fetching = False
+            waiters = self._waiters
+            self._waiters = []
+            for waiter in waiters:
+                if not waiter.done():
+                    waiter.set_result(None)
+
+    async def _wait(self):
+        waiter = asyncio.get_event_loop().create_future()
+        self._waiters.append(waiter)
+        await waiter
 
-    async def chunks(self, *, expand_files=True):
+    def chunks(self, *, expand_files=True, decompress=True, cache=True):
+        # This is checked before iterating so that callers know whether the
+        # stream can be read before they act on it.
+        if self._offset > 0 or (not self.replayable and self._consumed):
+            raise self._consumed_error()
+        if not self.replayable:
+            self._consumed = True
+        if not cache and self.replayable and self._sequence is not None:
+            chunks = iterable_to_async_iterable(self._sequence)
+        else:
+            # When all chunks are cached already nothing is saved by dropping
+            # them.
+            chunks = self._cached_chunks(cache or self._done)
+        if expand_files:
+            chunks = expand_send_files(chunks)
+        encoding = self._get_content_encoding() if decompress else None
+        if encoding is not None:
+            chunks = decompress_chunks(
+                chunks, encoding, self.max_decompressed_size,
+            )
+        return chunks
+
+    def _consumed_error(self):
+        if self.replayable:
+            return ValueError(
+                'stream has already been consumed without caching its chunks'
+            )
+        return ValueError(
+            'stream is not replayable and has already been consumed'
+        )
+
+    async def _cached_chunks(self, cache):
         index = 0
         while True:
-            if index < len(self._cache):
-                task = self._cache[index]
-            else:
-                task = asyncio.ensure_future(self._chunks.__anext__())
-                self._cache.append(task)
-            try:
-                chunk = await task
-            except StopAsyncIteration:
+            position = index - self._offset
+            if position < 0:
+                raise self._consumed_error()
+            elif position < len(self._cache):
+                chunk = self._cache[position]
+                if not cache or not self.replayable:
+                    del self._cache[:position + 1]
+                    self._offset += position + 1
+            elif self._error is not None:
+                raise self._error
+            elif self._done:
                 break
-            if isinstance(chunk, SendFile) and expand_files:
-                async for chunk in chunk.chunks():
-                    yield chunk
+            elif self._fetching:
+                await self._wait()
+                continue
             else:
-                yield chunk
+                await self._fetch()
+                continue
+            yield chunk
             index += 1
 
-    async def body(self):
+    def _limited_chunks(self, max_size, *, cache=True):
+        chunks = self.chunks(cache=cache)
+        if max_size is not None:
+            chunks = limit_chunks(chunks, max_size)
+        return chunks
+
+    async def body(self, *, max_size=None):
         chunks = []
-        async for chunk in self.chunks():
+        async for chunk in self._limited_chunks(max_size):
             chunks.append(chunk)
         return b''.join(chunks)
 
-    async def text(self):
-        return (await self.body()).decode(self.charset)
+    async def text(self, *, max_size=None):
+        return (await self.body(max_size=max_size)).decode(self.charset)
 
-    async def json(self):
-        return json.loads(await self.body())
+    async def json(self, *, max_size=None):
+        return json_codec.decode(await self.body(max_size=max_size))
 
-    async def form(self):
+    async def form(
+        self, *, spool_size=multipart.SPOOL_SIZE, max_size=None,
+        max_parts=None, max_header_size=None, max_field_size=None,
+    ):
         if self.content_type == 'application/x-www-form-urlencoded':
-            return MultiDict(urllib.parse.parse_qsl(await self.text()))
+            return MultiDict(urllib.parse.parse_qsl(
+                await self.text(max_size=max_size),
+            ))
         elif self.content_type == 'multipart/form-data':
-            return multipart.parse(await self.body(), boundary=self.boundary)
+            if self._form is not None:
+                # A copy is returned so that changes do not end up in the next
+                # result.
+                return MultiDict(self._form)
+            # The chunks are not cached, otherwise the whole body would be
+            # kept in memory next to the spooled files.
+            form = await multipart.parse_stream(
+                self._limited_chunks(max_size, cache=False), self.boundary,
+                spool_size=spool_size,
+                max_parts=max_parts,
+                max_header_size=max_header_size,
+                max_field_size=max_field_size,
+            )
+            if self._offset > 0:
+                # The body can not be read again.
+                self._form = MultiDict(form)
+            return form
         else:
             raise ValueError(
                 'content type must be either '
@@ -94,23 +352,47 @@ class Stream(ABC):
                 f'not {self.content_type}'
             )
 
+    async def parts(
+        self, *, max_size=None, max_parts=None, max_header_size=None,
+    ):
+        if self.content_type != 'multipart/form-data':
+            raise ValueError(
+                'content type must be multipart/form-data, '
+                f'not {self.content_type}'
+            )
+        # Parts are meant for bodies that are too big to keep in memory, so
+        # the chunks are not cached.
+        async for part in multipart.parse_parts(
+            self._limited_chunks(max_size, cache=False), self.boundary,
+            max_parts=max_parts, max_header_size=max_header_size,
+        ):
+            yield part
+
     @abstractmethod
     def _get_content_type(self):
         raise NotImplementedError
 
+    def _get_content_encoding(self):
+        return None
+
+    def _parse_content_type(self):
+        return cached_parse(
+            self._parse_cache, parse_content_type, self._get_content_type(),
+        )
+
     @property
     def content_type(self):
-        content_type, _ = parse_content_type(self._get_content_type())
+        content_type, _ = self._parse_content_type()
         return content_type
 
     @property
     def charset(self):
-        _, params = parse_content_type(self._get_content_type())
+        _, params = self._parse_content_type()
         return params.get('charset', 'UTF-8')
 
     @property
     def boundary(self):
-        _, params = parse_content_type(self._get_content_type())
+        _, params = self._parse_content_type()
         try:
             return params['boundary']
         except KeyError:
@@ -1,15 +1,15 @@
 import asyncio
-import urllib.parse
 
 from asgiref.compatibility import guarantee_single_callable
 
 from ..bridge import bridge
+from ..multidict import Headers
 
 from .exceptions import Disconnect
 from .request import Request
-from .response import Response
+from .response import Response, conditional_response
 from .socket import Socket
-from .stream import SendFile
+from .stream import SendFile, coalesce_chunks
 
 
 # Jackie to ASGI
@@ -27,6 +27,151 @@ async def get_request_body(receive):
             raise ValueError(f'unexpected message type: {message["type"]}')
 
 
+def get_request(scope, receive):
+    return Request(
+        method=scope['method'],
+        path=scope['path'],
+        query_string=scope['query_string'],
+        headers=scope['headers'],
+        body=get_request_body(receive),
+    )
+
+
+CONDITIONAL_HEADERS = frozenset([
+    b'if-none-match', b'if-modified-since', b'range', b'if-range',
+])
+
+
+async def send_response(response, scope, send):
+    if scope['method'] in ('GET', 'HEAD'):
+        request_headers = [
+            (key, value)
+            for key, value in scope['headers']
+            if key.lower() in CONDITIONAL_HEADERS
+        ]
+        if request_headers:
+            response = conditional_response(
+                response, Headers(request_headers),
+            )
+
+    # The chunks are not cached while sending so that a streaming body is
+    # not kept in memory. This raises when the body was consumed already, so
+    # it is done before anything is sent.
+    chunks = response.chunks(
+        expand_files=(
+            'http.response.zerocopysend'
+            not in
+            scope.get('extensions', {})
+        ),
+        cache=False,
+    )
+    await send({
+        'type': 'http.response.start',
+        'status': response.status,
+        'headers': response.headers.raw_items(),
+    })
+    if response.buffer_size > 0:
+        chunks = coalesce_chunks(
+            chunks, response.buffer_size, response.buffer_delay,
+        )
+    async for chunk in chunks:
+        if isinstance(chunk, SendFile):
+            message = {
+                'type': 'http.response.zerocopysend',
+                'file': open(chunk.path, 'rb'),
+                'more_body': True,
+            }
+            if chunk.offset != 0:
+                message['offset'] = chunk.offset
+            if chunk.size >= 0:
+                message['count'] = chunk.size
+            await send(message)
+        else:
+            await send({
+                'type': 'http.response.body',
+                'body': chunk,
+                'more_body': True,
+            })
+    await send({
+        'type': 'http.response.body',
+        'body': b'',
+        'more_body': False,
+    })
+
+
+async def get_socket(scope, receive, send):
+    message = await receive()
+    if message['type'] != 'websocket.connect':
+        raise ValueError(f'unexpected message: {message["type"]}')
+
+    state = 'handshake'
+
+    async def accept(headers):
+        nonlocal state
+        if state != 'handshake':
+            raise ValueError(
+                'can only accept connection during handshake'
+            )
+        state = 'open'
+        await send({
+            'type': 'websocket.accept',
+            'headers': headers.raw_items(),
+        })
+
+    async def close(code):
+        nonlocal state
+        if state == 'closed':
+            raise ValueError('connection already closed')
+        state = 'closed'
+        await send({'type': 'websocket.close', 'code': code})
+
+    async def receive_message():
+        nonlocal state
+        if state != 'open':
+            raise ValueError('connection is not open')
+        message = await receive()
+        if message['type'] == 'websocket.receive':
+            return message.get('text') or message.get('bytes')
+        elif message['type'] == 'websocket.disconnect':
+            state = 'closed'
+            raise Disconnect(message.get('code', 1000))
+        else:
+            raise ValueError(f'unexpected type: {message["type"]}')
+
+    async def send_message(message):
+        nonlocal state
+        if state != 'open':
+            raise ValueError('connection is not open')
+        if isinstance(message, str):
+            message = {
+                'type': 'websocket.send',
+                'text': message,
+                'bytes': None,
+            }
+        elif isinstance(message, bytes):
+            message = {
+                'type': 'websocket.send',
+                'text': None,
+                'bytes': message,
+            }
+        else:
+            raise TypeError(
+                'message must be either str or bytes, not '
+                f'{message.__class__.__name__}'
+            )
+        await send(message)
+
+    return Socket(
+        path=scope['path'],
+        query_string=scope['query_string'],
+        headers=scope['headers'],
+        accept=accept,
+        close=close,
+        receive=receive_message,
+        send=send_message,
+    )
+
+
 class JackieToAsgi:
 
     def __init__(self, view):
@@ -34,13 +179,7 @@ class JackieToAsgi:
 
     async def __call__(self, scope, receive, send):
         if scope['type'] == 'http':
-            request = Request(
-                method=scope['method'],
-                path=scope['path'],
-                query=urllib.parse.parse_qsl(scope['query_string'].decode()),
-                headers=scope['headers'],
-                body=get_request_body(receive),
-            )
+            request = get_request(scope, receive)
 
             try:
                 router_info = scope['jackie.router']
@@ -49,122 +188,16 @@ class JackieToAsgi:
             else:
                 request.router = router_info['router']
                 request.view_name = router_info['name']
-                params = router_info['params']
+                request.view_params = params = router_info['params']
 
             try:
                 response = await self.view(request, **params)
-                await send({
-                    'type': 'http.response.start',
-                    'status': response.status,
-                    'headers': [
-                        (key.encode(), value.encode())
-                        for key, value in response.headers.allitems()
-                    ],
-                })
-                async for chunk in response.chunks(expand_files=(
-                    'http.response.zerocopysend'
-                    not in
-                    scope.get('extensions', {})
-                )):
-                    if isinstance(chunk, SendFile):
-                        message = {
-                            'type': 'http.response.zerocopysend',
-                            'file': open(chunk.path, 'rb'),
-                            'more_body': True,
-                        }
-                        if chunk.offset != 0:
-                            message['offset'] = chunk.offset
-                        if chunk.size >= 0:
-                            message['count'] = chunk.size
-                        await send(message)
-                    else:
-                        await send({
-                            'type': 'http.response.body',
-                            'body': chunk,
-                            'more_body': True,
-                        })
-                await send({
-                    'type': 'http.response.body',
-                    'body': b'',
-                    'more_body': False,
-                })
+                await send_response(response, scope, send)
             except Disconnect:
                 pass
 
         elif scope['type'] == 'websocket':
-            message = await receive()
-            if message['type'] != 'websocket.connect':
-                raise ValueError(f'unexpected message: {message["type"]}')
-
-            state = 'handshake'
-
-            async def accept(headers):
-                nonlocal state
-                if state != 'handshake':
-                    raise ValueError(
-                        'can only accept connection during handshake'
-                    )
-                state = 'open'
-                await send({
-                    'type': 'websocket.accept',
-                    'headers': [
-                        (key.encode(), value.encode())
-                        for key, value in headers.allitems()
-                    ],
-                })
-
-            async def close(code):
-                nonlocal state
-                if state == 'closed':
-                    raise ValueError('connection already closed')
-                state = 'closed'
-                await send({'type': 'websocket.close', 'code': code})
-
-            async def receive_message():
-                nonlocal state
-                if state != 'open':
-                    raise ValueError('connection is not open')
-                message = await receive()
-                if message['type'] == 'websocket.receive':
-                    return message.get('text') or message.get('bytes')
-                elif message['type'] == 'websocket.disconnect':
-                    state = 'closed'
-                    raise Disconnect(message.get('code', 1000))
-                else:
-                    raise ValueError(f'unexpected type: {message["type"]}')
-
-            async def send_message(message):
-                nonlocal state
-                if state != 'open':
-                    raise ValueError('connection is not open')
-                if isinstance(message, str):
-                    message = {
-                        'type': 'websocket.send',
-                        'text': message,
-                        'bytes': None,
-                    }
-                elif isinstance(message, bytes):
-                    message = {
-                        'type': 'websocket.send',
-                        'text': None,
-                        'bytes': message,
-                    }
-                else:
-                    raise TypeError(
-                        'message must be either str or bytes, not '
-                        f'{message.__class__.__name__}'
-                    )
-                await send(message)
-
-            socket = Socket(
-                path=scope['path'],
-                query=urllib.parse.parse_qsl(scope['query_string'].decode()),
-                headers=scope['headers'],
-                accept=accept,
-                close=close,
-                receive=receive_message,
-                send=send_message,
-            )
+            socket = await get_socket(scope, receive, send)
 
             try:
                 router_info = scope['jackie.router']
@@ -173,7 +206,7 @@ class JackieToAsgi:
             else:
                 socket.router = router_info['router']
                 socket.view_name = router_info['name']
-                params = router_info['params']
+                socket.view_params = params = router_info['params']
 
             return await self.view(socket, **params)
 
@@ -232,6 +265,10 @@ class AsgiToJackie:
         self.app = guarantee_single_callable(app)
 
     async def __call__(self, request, **params):
+        if isinstance(request, (Request, Socket)):
+            # Routed views are called without params, the router puts them
+            # on the request instead.
+            params = {**request.view_params, **params}
         if isinstance(request, Request):
             put_in, get_in = bridge()
             put_out, get_out = bridge()
@@ -254,21 +291,17 @@ class AsgiToJackie:
                 except (RuntimeError, GeneratorExit):
                     pass
 
-            body_task = asyncio.ensure_future(
-                send_request_body(request.chunks(), put_in)
-            )
+            # The body is only read once to pass it on to the app.
+            body_task = asyncio.ensure_future(send_request_body(
+                request.chunks(decompress=False, cache=False), put_in,
+            ))
 
             scope = {
                 'type': 'http',
                 'method': request.method,
                 'path': request.path,
-                'query_string': urllib.parse.urlencode(
-                    list(request.query.allitems())
-                ).encode(),
-                'headers': [
-                    (key.encode(), value.encode())
-                    for key, value in request.headers.allitems()
-                ],
+                'query_string': request.query_string,
+                'headers': request.headers.raw_items(),
                 'jackie.router': {
                     'router': request.router,
                     'name': request.view_name,
@@ -311,13 +344,8 @@ class AsgiToJackie:
             scope = {
                 'type': 'websocket',
                 'path': request.path,
-                'query_string': urllib.parse.urlencode(
-                    list(request.query.allitems())
-                ).encode(),
-                'headers': [
-                    (key.encode(), value.encode())
-                    for key, value in request.headers.allitems()
-                ],
+                'query_string': request.query_string,
+                'headers': request.headers.raw_items(),
                 'jackie.router': {
                     'router': request.router,
                     'name': request.view_name,
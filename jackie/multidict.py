@@ -2,35 +2,84 @@ from collections.abc import MutableMapping
 from itertools import chain
 
 
+class Values(list):
+    # Marks a key that has multiple values, keys with a single value store
+    # that value directly so that no list is needed for them.
+    __slots__ = ()
+
+
+def add_value(values, key, value):
+    if key not in values:
+        values[key] = value
+        return
+    current = values[key]
+    if type(current) is Values:
+        current.append(value)
+    else:
+        values[key] = Values((current, value))
+
+
 class MultiDict(MutableMapping):
 
+    __slots__ = ('_values',)
+
     def __init__(self, items=[], **kwargs):
-        if isinstance(items, MultiDict):
-            items = items.allitems()
-        elif isinstance(items, dict):
-            items = items.items()
-        if kwargs:
-            items = chain(items, kwargs.items())
         values = {}
-        for key, value in items:
-            key = self._clean_key(key)
-            value = self._clean_value(value)
-            values.setdefault(key, []).append(value)
+        if type(items) is type(self):
+            # The values of a multidict of the same type are clean already so
+            # they only have to be copied.
+            for key, value in items._values.items():
+                if type(value) is Values:
+                    value = Values(value)
+                values[key] = value
+            items = kwargs.items()
+        else:
+            if isinstance(items, MultiDict):
+                items = items.allitems()
+            elif isinstance(items, dict):
+                items = items.items()
+            if kwargs:
+                items = chain(items, kwargs.items())
+        cls = type(self)
+        if (
+            cls._clean_key is MultiDict._clean_key and
+            cls._clean_value is MultiDict._clean_value
+        ):
+            # add_value inlined since this is the most common case.
+            for key, value in items:
+                if key not in values:
+                    values[key] = value
+                    continue
+                current = values[key]
+                if type(current) is Values:
+                    current.append(value)
+                else:
+                    values[key] = Values((current, value))
+        else:
+            clean_key = self._clean_key
+            clean_value = self._clean_value
+            for key, value in items:
+                add_value(values, clean_key(key), clean_value(value))
         self._values = values
 
     def __getitem__(self, key):
-        key = self._clean_key(key)
-        return self._values[key][-1]
+        value = self._values[self._clean_key(key)]
+        if type(value) is Values:
+            return value[-1]
+        return value
 
     def __setitem__(self, key, value):
         key = self._clean_key(key)
         value = self._clean_value(value)
-        self._values[key] = [value]
+        self._values[key] = value
 
     def __delitem__(self, key):
         key = self._clean_key(key)
         del self._values[key]
 
+    def __contains__(self, key):
+        return self._clean_key(key) in self._values
+
     def __len__(self):
         return len(self._values)
 
@@ -40,42 +89,51 @@ class MultiDict(MutableMapping):
     def getlist(self, key):
         key = self._clean_key(key)
         try:
-            values = self._values[key]
+            value = self._values[key]
         except KeyError:
             return []
-        else:
-            return list(values)
+        if type(value) is Values:
+            return list(value)
+        return [value]
 
     def setlist(self, key, values):
         key = self._clean_key(key)
         values = list(map(self._clean_value, values))
-        if values:
-            self._values[key] = values
+        if len(values) > 1:
+            self._values[key] = Values(values)
+        elif values:
+            self._values[key] = values[0]
         else:
             self._values.pop(key, None)
 
     def appendlist(self, key, value):
         key = self._clean_key(key)
         value = self._clean_value(value)
-        self._values.setdefault(key, []).append(value)
+        add_value(self._values, key, value)
 
     def extendlist(self, key, values):
         key = self._clean_key(key)
         values = list(map(self._clean_value, values))
-        if values:
-            self._values.setdefault(key, []).extend(values)
+        for value in values:
+            add_value(self._values, key, value)
 
     def poplist(self, key):
         key = self._clean_key(key)
         values = self._values[key]
-        value = values.pop()
-        if not values:
+        if type(values) is not Values:
             del self._values[key]
+            return values
+        value = values.pop()
+        if len(values) == 1:
+            self._values[key] = values[0]
         return value
 
     def allitems(self):
-        for key, values in self._values.items():
-            for value in values:
+        for key, value in self._values.items():
+            if type(value) is Values:
+                for item in value:
+                    yield key, item
+            else:
                 yield key, value
 
     def _clean_key(self, key):
@@ -87,6 +145,124 @@ class MultiDict(MutableMapping):
 
 class Headers(MultiDict):
 
+    __slots__ = ('_raw', '_index')
+
+    def __init__(self, items=[], **kwargs):
+        # Raw ASGI headers are kept as they are, they are only decoded into
+        # an index when the headers are accessed. As long as the headers are
+        # not changed the raw headers can be sent on without encoding them.
+        if kwargs:
+            raw = None
+        elif isinstance(items, Headers):
+            raw = items._raw
+        elif isinstance(items, (list, tuple)) and all(
+            type(key) is bytes and type(value) is bytes
+            for key, value in items
+        ):
+            raw = list(items)
+        else:
+            raw = None
+        if raw is not None:
+            self._raw = raw
+            self._index = None
+        else:
+            self._raw = None
+            super().__init__(items, **kwargs)
+
+    def _build_index(self):
+        index = {}
+        for key, value in self._raw:
+            add_value(index, key.decode().lower(), value)
+        self._index = index
+
+    @property
+    def _values(self):
+        if self._index is None:
+            self._build_index()
+        return self._index
+
+    @_values.setter
+    def _values(self, values):
+        self._index = values
+
+    def _modify(self):
+        # Once the headers are changed the raw headers are out of date.
+        if self._raw is not None:
+            if self._index is None:
+                self._build_index()
+            self._raw = None
+
+    def _decode(self, key):
+        # Values from the raw headers are decoded when they are looked up.
+        value = self._values[key]
+        if type(value) is bytes:
+            value = self._values[key] = value.decode()
+        elif type(value) is Values:
+            for index, item in enumerate(value):
+                if type(item) is bytes:
+                    value[index] = item.decode()
+        return value
+
+    def __getitem__(self, key):
+        value = self._decode(self._clean_key(key))
+        if type(value) is Values:
+            return value[-1]
+        return value
+
+    def __setitem__(self, key, value):
+        self._modify()
+        super().__setitem__(key, value)
+
+    def __delitem__(self, key):
+        self._modify()
+        super().__delitem__(key)
+
+    def getlist(self, key):
+        key = self._clean_key(key)
+        try:
+            value = self._decode(key)
+        except KeyError:
+            return []
+        if type(value) is Values:
+            return list(value)
+        return [value]
+
+    def setlist(self, key, values):
+        self._modify()
+        super().setlist(key, values)
+
+    def appendlist(self, key, value):
+        self._modify()
+        super().appendlist(key, value)
+
+    def extendlist(self, key, values):
+        self._modify()
+        super().extendlist(key, values)
+
+    def poplist(self, key):
+        self._modify()
+        self._decode(self._clean_key(key))
+        return super().poplist(key)
+
+    def allitems(self):
+        for key in self._values:
+            value = self._decode(key)
+            if type(value) is Values:
+                for item in value:
+                    yield key, item
+            else:
+                yield key, value
+
+    def raw_items(self):
+        # A copy is returned since ASGI middleware is allowed to change the
+        # headers of a message in place.
+        if self._raw is not None:
+            return list(self._raw)
+        return [
+            (key.encode(), value.encode())
+            for key, value in self.allitems()
+        ]
+
     def _clean_key(self, key):
         if isinstance(key, bytes):
             key = key.decode()
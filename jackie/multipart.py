@@ -1,12 +1,17 @@
-from collections import namedtuple
-from io import BytesIO
 import os
+from tempfile import SpooledTemporaryFile
 
-from .multidict import MultiDict
-from .parse import parse_content_disposition, parse_content_type
+from .exceptions import LimitExceeded
+from .multidict import MultiDict, Headers
+from .parse import (
+    cached_parse, parse_content_disposition, parse_content_type,
+)
 
 
-File = namedtuple('File', ['name', 'content_type', 'content'])
+# Files in form data that are bigger than this amount of bytes are written to
+# disk instead of being kept in memory.
+SPOOL_SIZE = 1024 * 1024
+CHUNK_SIZE = 65536
 
 
 class File:
@@ -14,52 +19,201 @@ class File:
     def __init__(self, name, content_type, content):
         self.name = name
         self._content_type = content_type
-        self.content = content
+        self._content = content
+        self._parse_cache = {}
+
+    @property
+    def content(self):
+        if isinstance(self._content, bytes):
+            return self._content
+        self._content.seek(0)
+        return self._content.read()
+
+    async def chunks(self, *, chunk_size=CHUNK_SIZE):
+        if isinstance(self._content, bytes):
+            yield self._content
+            return
+        offset = 0
+        while True:
+            # Seek every time so multiple iterators can read the same file
+            self._content.seek(offset)
+            chunk = self._content.read(chunk_size)
+            if not chunk:
+                break
+            offset += len(chunk)
+            yield chunk
+
+    def _parse_content_type(self):
+        return cached_parse(
+            self._parse_cache, parse_content_type, self._content_type,
+        )
 
     @property
     def content_type(self):
-        content_type, _ = parse_content_type(self._content_type)
+        content_type, _ = self._parse_content_type()
         return content_type
 
     @property
     def charset(self):
-        _, params = parse_content_type(self._content_type)
+        _, params = self._parse_content_type()
         return params.get('charset', 'UTF-8')
 
     @property
     def boundary(self):
-        _, params = parse_content_type(self._content_type)
+        _, params = self._parse_content_type()
         try:
             return params['boundary']
         except KeyError:
             raise ValueError('no boundary provided') from None
 
 
-def generate_boundary():
-    return '----------------' + os.urandom(32).hex()
+def parse_part_headers(headers):
+    try:
+        disposition, disposition_params = parse_content_disposition(
+            headers.pop(b'content-disposition')
+        )
+    except KeyError:
+        raise ValueError(
+            'invalid form data: expected header Content-Disposition'
+        )
+    except ValueError as e:
+        raise ValueError(
+            f'invalid form data: invalid Content-Disposition: {e}'
+        ) from None
 
+    if disposition != 'form-data':
+        raise ValueError(
+            'invalid form data: expected form-data Content-Disposition'
+        )
 
-def parse(data, boundary):
-    boundary = boundary.encode()
-    start = b'--' + boundary
-    end = b'--' + boundary + b'--'
-    lines = iter(data.splitlines(True))
+    # The parsed params can be shared through the parse cache.
+    disposition_params = {**disposition_params}
+    try:
+        name = disposition_params.pop('name')
+    except KeyError:
+        raise ValueError(
+            'invalid form data: expected name in Content-Disposition'
+        )
 
-    data = MultiDict()
+    try:
+        file_name = disposition_params.pop('filename')
+    except KeyError:
+        file_name = None
 
-    line = next(lines).rstrip(b'\r\n')
-    if line == end:
-        return data
-    if line != start:
-        raise ValueError('invalid form data: missing boundary')
+    if disposition_params:
+        raise ValueError(
+            'invalid form data: unexpected Content-Disposition param ' +
+            next(iter(disposition_params))
+        )
+
+    if file_name is None:
+        content_type = None
+    else:
+        try:
+            content_type = headers.pop(b'content-type').decode()
+        except KeyError:
+            raise ValueError(
+                'invalid form data: expected header Content-Type'
+            )
+
+    if headers:
+        raise ValueError(
+            'invalid form data: unexpected header ' +
+            next(iter(headers)).decode()
+        )
+
+    return name, file_name, content_type
+
+
+class Parser:
+
+    def __init__(
+        self, chunks, boundary, *, max_parts=None, max_header_size=None,
+    ):
+        if not hasattr(chunks, '__aiter__'):
+            chunks = iterable_to_async_iterable(chunks)
+        self._chunks = chunks.__aiter__()
+        self._delimiter = b'--' + boundary.encode()
+        self._max_parts = max_parts
+        self._max_header_size = max_header_size
+        self._buffer = bytearray()
+        self._eof = False
+        self._state = 'start'
+        self._parts = 0
+
+    async def _read(self):
+        if self._eof:
+            return False
+        try:
+            chunk = await self._chunks.__anext__()
+        except StopAsyncIteration:
+            self._eof = True
+            return False
+        self._buffer += chunk
+        return True
+
+    async def _read_line(self, max_size=None):
+        # Returns the next line including its line ending, or None at the end
+        # of the data.
+        start = 0
+        while True:
+            index = self._buffer.find(b'\n', start)
+            if max_size is not None and (
+                len(self._buffer) if index == -1 else index + 1
+            ) > max_size:
+                raise LimitExceeded(
+                    'form data part headers exceed max size of '
+                    f'{self._max_header_size} bytes'
+                )
+            if index != -1:
+                line = bytes(self._buffer[:index + 1])
+                del self._buffer[:index + 1]
+                return line
+            start = len(self._buffer)
+            if not await self._read():
+                if not self._buffer:
+                    return None
+                line = bytes(self._buffer)
+                self._buffer.clear()
+                return line
+
+    async def next_part(self):
+        if self._state == 'body':
+            async for _ in self.read():
+                pass
+
+        if self._state == 'start':
+            line = await self._read_line()
+            if line is not None:
+                line = line.rstrip(b'\r\n')
+            if line == self._delimiter + b'--':
+                self._state = 'done'
+            elif line != self._delimiter:
+                raise ValueError('invalid form data: missing boundary')
+
+        if self._state == 'done':
+            # Anything after the final delimiter is ignored but still read so
+            # that the underlying stream is exhausted.
+            self._buffer.clear()
+            while await self._read():
+                self._buffer.clear()
+            return None
+
+        self._parts += 1
+        if self._max_parts is not None and self._parts > self._max_parts:
+            raise LimitExceeded(
+                f'form data exceeds max parts of {self._max_parts}'
+            )
 
-    while True:
         headers = {}
+        header_size = self._max_header_size
         while True:
-            try:
-                line = next(lines).rstrip(b'\r\n')
-            except StopIteration:
+            line = await self._read_line(header_size)
+            if line is None:
                 raise ValueError('invalid form data: unexpected end of data')
+            if header_size is not None:
+                header_size -= len(line)
+            line = line.rstrip(b'\r\n')
             if not line:
                 break
             try:
@@ -68,84 +222,241 @@ def parse(data, boundary):
                 raise ValueError('invalid form data: expected header')
             headers[key.strip().lower()] = value.strip()
 
-        try:
-            disposition, disposition_params = parse_content_disposition(
-                headers.pop(b'content-disposition')
-            )
-        except KeyError:
-            raise ValueError(
-                'invalid form data: expected header Content-Disposition'
-            )
-        except ValueError as e:
-            raise ValueError(
-                f'invalid form data: invalid Content-Disposition: {e}'
-            ) from None
+        self._state = 'body'
+        return headers
 
-        if disposition != 'form-data':
-            raise ValueError(
-                'invalid form data: expected form-data Content-Disposition'
-            )
+    async def read(self):
+        if self._state != 'body':
+            return
 
-        try:
-            name = disposition_params.pop('name')
-        except KeyError:
-            raise ValueError(
-                'invalid form data: expected name in Content-Disposition'
-            )
+        # The newline that ended the headers is put back so that a delimiter
+        # directly after the headers is found the same way as any other.
+        pattern = b'\n' + self._delimiter
+        self._buffer.insert(0, ord('\n'))
+        start = 1
+        index = 0
 
-        try:
-            file_name = disposition_params.pop('filename')
-        except KeyError:
-            file_name = None
+        while True:
+            index = self._buffer.find(pattern, index)
 
-        if disposition_params:
-            raise ValueError(
-                'invalid form data: unexpected Content-Disposition param ' +
-                next(iter(disposition_params))
-            )
+            if index == -1:
+                # Everything up until the last len(pattern) bytes can not be
+                # part of a delimiter, including an optional carriage return.
+                end = len(self._buffer) - len(pattern)
+                if end > start:
+                    yield bytes(self._buffer[start:end])
+                    del self._buffer[:end]
+                    start = 0
+                index = 0
+                if not await self._read():
+                    raise ValueError(
+                        'invalid form data: unexpected end of data'
+                    )
+                continue
+
+            rest_start = index + len(pattern)
+            rest_end = self._buffer.find(b'\n', rest_start)
+            if rest_end == -1:
+                rest = bytes(self._buffer[rest_start:]).rstrip(b'\r')
+                if rest in (b'', b'-', b'--') and await self._read():
+                    continue
+                rest_end = len(self._buffer)
+            else:
+                rest = bytes(self._buffer[rest_start:rest_end]).rstrip(b'\r')
+
+            if rest not in (b'', b'--'):
+                index += 1
+                continue
+
+            end = index
+            if end > start and self._buffer[end - 1] == ord('\r'):
+                end -= 1
+            if end > start:
+                yield bytes(self._buffer[start:end])
+            del self._buffer[:rest_end + 1]
+            # The delimiter line of the next part has been read already.
+            self._state = 'done' if rest == b'--' else 'headers'
+            return
+
+    async def parts(self):
+        while True:
+            headers = await self.next_part()
+            if headers is None:
+                break
+            yield headers
 
-        if file_name is None:
-            content_type = None
+
+async def iterable_to_async_iterable(iterable):
+    for value in iterable:
+        yield value
+
+
+class Part:
+
+    def __init__(self, parser, headers):
+        self._parser = parser
+        self.headers = Headers(headers.items())
+        self.name, self.file_name, self._content_type = parse_part_headers(
+            {**headers},
+        )
+        self._parse_cache = {}
+
+    async def chunks(self):
+        if self._parser is None:
+            raise ValueError('part has already been read')
+        parser = self._parser
+        self._parser = None
+        async for chunk in parser.read():
+            yield chunk
+
+    async def body(self):
+        chunks = []
+        async for chunk in self.chunks():
+            chunks.append(chunk)
+        return b''.join(chunks)
+
+    async def text(self):
+        return (await self.body()).decode(self.charset)
+
+    def _parse_content_type(self):
+        return cached_parse(
+            self._parse_cache, parse_content_type, self._content_type,
+        )
+
+    @property
+    def content_type(self):
+        content_type, _ = self._parse_content_type()
+        return content_type
+
+    @property
+    def charset(self):
+        _, params = self._parse_content_type()
+        return params.get('charset', 'UTF-8')
+
+
+async def parse_parts(
+    chunks, boundary, *, max_parts=None, max_header_size=None,
+):
+    parser = Parser(
+        chunks, boundary,
+        max_parts=max_parts, max_header_size=max_header_size,
+    )
+    async for headers in parser.parts():
+        part = Part(parser, headers)
+        yield part
+        # Once the next part is requested the parser has moved past the body
+        # of this part.
+        part._parser = None
+
+
+async def parse_stream(
+    chunks, boundary, *, spool_size=SPOOL_SIZE, max_parts=None,
+    max_header_size=None, max_field_size=None,
+):
+    data = MultiDict()
+
+    async for part in parse_parts(
+        chunks, boundary,
+        max_parts=max_parts, max_header_size=max_header_size,
+    ):
+        if part.file_name is None:
+            value = bytearray()
+            async for chunk in part.chunks():
+                value += chunk
+                if max_field_size is not None and len(value) > max_field_size:
+                    raise LimitExceeded(
+                        'form data field exceeds max size of '
+                        f'{max_field_size} bytes'
+                    )
+            value = value.decode()
         else:
-            try:
-                content_type = headers.pop(b'content-type').decode()
-            except KeyError:
-                raise ValueError(
-                    'invalid form data: expected header Content-Type'
-                )
+            content = SpooledTemporaryFile(max_size=spool_size)
+            async for chunk in part.chunks():
+                content.write(chunk)
+            value = File(part.file_name, part._content_type, content)
 
-        if headers:
-            raise ValueError(
-                'invalid form data: unexpected header ' +
-                next(iter(headers)).decode()
-            )
+        data.appendlist(part.name, value)
 
-        value = BytesIO()
-        line_end = b''
+    return data
+
+
+def generate_boundary():
+    return '----------------' + os.urandom(32).hex()
+
+
+def find_delimiter(data, pattern, start=0):
+    # Finds the first occurrence of pattern that makes up a complete delimiter
+    # line, returns the index of the pattern, the index after the line and
+    # whether it was the final delimiter.
+    while True:
+        index = data.find(pattern, start)
+        if index == -1:
+            return None
+        rest_start = index + len(pattern)
+        rest_end = data.find(b'\n', rest_start)
+        if rest_end == -1:
+            rest_end = len(data)
+        rest = data[rest_start:rest_end].rstrip(b'\r')
+        if rest == b'' or rest == b'--':
+            return index, rest_end + 1, rest == b'--'
+        start = index + 1
+
+
+def parse(data, boundary):
+    delimiter = b'--' + boundary.encode()
+    pattern = b'\n' + delimiter
+    view = memoryview(data)
+
+    line_end = data.find(b'\n')
+    if line_end == -1:
+        line_end = len(data)
+    line = data[:line_end].rstrip(b'\r')
+
+    form = MultiDict()
+    if line == delimiter + b'--':
+        return form
+    if line != delimiter:
+        raise ValueError('invalid form data: missing boundary')
+    pos = line_end + 1
+
+    while True:
+        headers = {}
         while True:
-            try:
-                line = next(lines)
-            except StopIteration:
+            line_end = data.find(b'\n', pos)
+            if line_end == -1:
                 raise ValueError('invalid form data: unexpected end of data')
-            stripped_line = line.rstrip(b'\r\n')
-            if stripped_line in [start, end]:
+            line = data[pos:line_end].rstrip(b'\r')
+            pos = line_end + 1
+            if not line:
                 break
-            value.write(line_end)
-            value.write(stripped_line)
-            line_end = line[len(stripped_line):]
+            try:
+                key, value = line.split(b':', 1)
+            except ValueError:
+                raise ValueError('invalid form data: expected header')
+            headers[key.strip().lower()] = value.strip()
+
+        name, file_name, content_type = parse_part_headers(headers)
+
+        # The newline that ended the headers can also be the start of the
+        # delimiter when the body is empty.
+        found = find_delimiter(data, pattern, pos - 1)
+        if found is None:
+            raise ValueError('invalid form data: unexpected end of data')
+        end, next_pos, done = found
+        if end > pos and data[end - 1] == ord('\r'):
+            end -= 1
 
-        value = value.getvalue()
         if file_name is not None:
-            value = File(file_name, content_type, value)
+            value = File(file_name, content_type, bytes(view[pos:end]))
         else:
-            value = value.decode()
-        print('FIELD', name, value)
-        data.appendlist(name, value)
+            value = str(view[pos:end], 'utf-8')
+        form.appendlist(name, value)
 
-        if stripped_line == end:
+        if done:
             break
+        pos = next_pos
 
-    return data
+    return form
 
 
 async def serialize(data, boundary):
@@ -169,10 +480,11 @@ async def serialize(data, boundary):
             yield value.name.encode()
             yield b'\nContent-Type: '
             yield value._content_type.encode()
-            value = value.content
+            yield b'\n\n'
+            async for chunk in value.chunks():
+                yield chunk
         else:
-            value = value.encode()
-        yield b'\n\n'
-        yield value
+            yield b'\n\n'
+            yield value.encode()
         yield b'\n'
     yield end
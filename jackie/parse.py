@@ -1,9 +1,20 @@
+from collections import namedtuple, OrderedDict
 from datetime import datetime, timezone
 import functools
+import re
+from types import MappingProxyType
 
 
 SPACE = ' \t'
 CONTROL = '()<>@,;:\\/[]?={}'
+NO_KEYS = frozenset()
+
+# Regexes that match the same tokens as lex, these are used by the fast
+# parsers for common headers.
+NAME = r'[^ \t"()<>@,;:\\/\[\]?={}]+'
+STRING = r'"([^"\\]*(?:\\.[^"\\]*)*)"'
+VALUE = rf'(?:({NAME})|{STRING})'
+SPACE_RE = re.compile(r'[ \t]*')
 
 
 def lex(content):
@@ -52,26 +63,134 @@ def lex(content):
     yield ('end', index, b'')
 
 
-def parser(parse):
+# Values longer than this amount of characters are never cached so that the
+# memory used by the cache stays bounded.
+CACHE_MAX_LENGTH = 1024
+
+CacheInfo = namedtuple(
+    'CacheInfo', ['hits', 'misses', 'evictions', 'maxsize', 'currsize'],
+)
+
+
+def freeze(value):
+    if isinstance(value, dict):
+        return MappingProxyType({
+            key: freeze(item) for key, item in value.items()
+        })
+    elif isinstance(value, (list, tuple)):
+        return tuple(map(freeze, value))
+    else:
+        return value
+
+
+class ParseCache:
+
+    def __init__(self, size=0, max_length=CACHE_MAX_LENGTH):
+        self._values = OrderedDict()
+        self.configure(size=size, max_length=max_length)
+
+    def configure(self, *, size, max_length=CACHE_MAX_LENGTH):
+        self._size = size
+        self._max_length = max_length
+        self.clear()
+
+    def clear(self):
+        self._values.clear()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+    def get(self, parse, content):
+        if not self._size or len(content) > self._max_length:
+            return parse(content)
+
+        key = (parse, content)
+        try:
+            result = self._values[key]
+        except KeyError:
+            self._misses += 1
+        else:
+            self._hits += 1
+            self._values.move_to_end(key)
+            return result
+
+        # Results are shared between all callers so they are made read-only.
+        result = self._values[key] = freeze(parse(content))
+        if len(self._values) > self._size:
+            self._values.popitem(last=False)
+            self._evictions += 1
+        return result
+
+    def info(self):
+        return CacheInfo(
+            hits=self._hits,
+            misses=self._misses,
+            evictions=self._evictions,
+            maxsize=self._size,
+            currsize=len(self._values),
+        )
+
+
+# The cache is shared by all parse functions and is disabled until it is
+# configured with a size.
+cache = ParseCache()
+
+
+def parser(parse=None, *, fast_parse=None):
+    # fast_parse can be given to parse common values of a header without the
+    # lexer, it returns None for anything it does not handle so that the
+    # result and errors of everything else come from parse.
+    if parse is None:
+        return functools.partial(parser, fast_parse=fast_parse)
+
+    def parse_content(content):
+        if fast_parse is not None:
+            result = fast_parse(content)
+            if result is not None:
+                return result
+        content = list(lex(content)), 0, NO_KEYS
+        content, result = parse(content)
+        parse_token(content, 'end')
+        return result
+
     @functools.wraps(parse)
     def wrapped_parse(content, *args, **kwargs):
         if isinstance(content, (str, bytes)):
-            content = list(lex(content)), 0, set()
-            content, result = parse(content, *args, **kwargs)
-            parse_token(content, 'end')
-            return result
+            if isinstance(content, bytes):
+                content = content.decode()
+            if args or kwargs:
+                content = list(lex(content)), 0, NO_KEYS
+                content, result = parse(content, *args, **kwargs)
+                parse_token(content, 'end')
+                return result
+            return cache.get(parse_content, content)
         else:
             return parse(content, *args, **kwargs)
     return wrapped_parse
 
 
+def cached_parse(cache, parse, content):
+    # Remembers the result of the last content parsed with parse in cache so
+    # that a header is only parsed again when it changes.
+    try:
+        cached_content, result = cache[parse]
+    except KeyError:
+        pass
+    else:
+        if cached_content is content or cached_content == content:
+            return result
+    result = parse(content)
+    cache[parse] = content, result
+    return result
+
+
 @parser
 def parse_token(content, *keys, optional=False):
     tokens, index, checked = content
     key, i, _ = tokens[index]
     if key in keys:
-        return (tokens, index + 1, set()), tokens[index]
-    checked = checked | set(keys)
+        return (tokens, index + 1, NO_KEYS), tokens[index]
+    checked = checked.union(keys)
     if optional:
         return (tokens, index, checked), None
     keys = list(map(repr, sorted(checked)))
@@ -182,17 +301,23 @@ def parse_name(content):
     return content, name
 
 
+def unescape(string):
+    if '\\' not in string:
+        return string
+    raw_chars = iter(string)
+    str_chars = []
+    for char in raw_chars:
+        if char == '\\':
+            char = next(raw_chars)
+        str_chars.append(char)
+    return ''.join(str_chars)
+
+
 @parser
 def parse_value(content):
     content, (key, _, value) = parse_token(content, 'name', 'string')
     if key == 'string':
-        raw_chars = iter(value[1:-1])
-        str_chars = []
-        for char in raw_chars:
-            if char == '\\':
-                char = next(raw_chars)
-            str_chars.append(char)
-        value = ''.join(str_chars)
+        value = unescape(value[1:-1])
     return content, value
 
 
@@ -224,7 +349,30 @@ def parse_media_type(content):
     return content, f'{type_}/{subtype}'
 
 
-@parser
+MEDIA_TYPE_RE = re.compile(rf'[ \t]*({NAME})[ \t]*/[ \t]*({NAME})[ \t]*')
+PARAM_RE = re.compile(
+    rf';[ \t]*({NAME})[ \t]*=[ \t]*{VALUE}[ \t]*', re.DOTALL,
+)
+
+
+def fast_parse_content_type(content):
+    match = MEDIA_TYPE_RE.match(content)
+    if match is None:
+        return None
+    type_, subtype = match.groups()
+    params = {}
+    index = match.end()
+    while index < len(content):
+        match = PARAM_RE.match(content, index)
+        if match is None:
+            return None
+        name, value, string = match.groups()
+        params[name] = unescape(string) if value is None else value
+        index = match.end()
+    return f'{type_}/{subtype}', params
+
+
+@parser(fast_parse=fast_parse_content_type)
 def parse_content_type(content):
     if content is None:
         return None, {}
@@ -234,6 +382,76 @@ def parse_content_type(content):
 
 
 @parser
+def parse_range(content):
+    content, _ = parse_enum(content, 'bytes')
+    content, _ = parse_token(content, '=')
+    ranges = []
+    while True:
+        index = content[1]
+        content, spec = parse_name(content)
+        start, sep, end = spec.partition('-')
+        if (
+            not sep or
+            not (start or end) or
+            not (start.isdigit() or not start) or
+            not (end.isdigit() or not end) or
+            (start and end and int(start) > int(end))
+        ):
+            raise ValueError(f'{index}: invalid range')
+        ranges.append((
+            int(start) if start else None,
+            int(end) if end else None,
+        ))
+        content, token = parse_token(content, ',', optional=True)
+        if token is None:
+            break
+    return content, ranges
+
+
+@parser
+def parse_accept_encoding(content):
+    encodings = {}
+    while True:
+        _, token = parse_token(content, 'end', optional=True)
+        if token is not None:
+            break
+        content, name = parse_name(content)
+        index = content[1]
+        content, params = parse_params(content)
+        try:
+            quality = float(params.get('q', '1'))
+        except ValueError:
+            raise ValueError(f'{index}: invalid quality') from None
+        encodings[name.lower()] = quality
+        content, token = parse_token(content, ',', optional=True)
+        if token is None:
+            break
+    return content, encodings
+
+
+COOKIE_RE = re.compile(
+    rf'({NAME})[ \t]*=[ \t]*{VALUE}[ \t]*(?:(;)[ \t]*)?', re.DOTALL,
+)
+
+
+def fast_parse_cookies(content):
+    cookies = {}
+    index = SPACE_RE.match(content).end()
+    while index < len(content):
+        match = COOKIE_RE.match(content, index)
+        if match is None:
+            return None
+        name, value, string, separator = match.groups()
+        cookies[name] = unescape(string) if value is None else value
+        index = match.end()
+        if separator is None:
+            break
+    if index < len(content):
+        return None
+    return cookies
+
+
+@parser(fast_parse=fast_parse_cookies)
 def parse_cookies(content):
     cookies = {}
     while True:
@@ -250,7 +468,103 @@ def parse_cookies(content):
     return content, cookies
 
 
-@parser
+SET_COOKIE_RE = re.compile(
+    rf'[ \t]*({NAME})[ \t]*=[ \t]*{VALUE}[ \t]*', re.DOTALL,
+)
+SET_COOKIE_PARAM_RE = re.compile(
+    rf';[ \t]*({NAME})[ \t]*(?:=[ \t]*([^;]*?)[ \t]*)?(?=;|\Z)', re.DOTALL,
+)
+SET_COOKIE_PARAMS = {
+    normalize_enum(name): name
+    for name in [
+        'expires', 'max_age', 'domain', 'path', 'secure', 'http_only',
+        'same_site',
+    ]
+}
+DATE_RE = re.compile(
+    r'([A-Za-z]+)[ \t]*,[ \t]*([0-9]+)[ \t]+([A-Za-z]+)[ \t]+([0-9]+)[ \t]+'
+    r'([0-9]+)[ \t]*:[ \t]*([0-9]+)[ \t]*:[ \t]*([0-9]+)[ \t]+([A-Za-z]+)'
+)
+VALUE_RE = re.compile(VALUE, re.DOTALL)
+INT_RE = re.compile(r'[0-9]+')
+PATH_RE = re.compile(r'[^ \t"()<>@,;:\\\[\]?={}]*')
+SAME_SITE = {'lax', 'strict', 'none'}
+
+
+def fast_parse_date(content):
+    match = DATE_RE.fullmatch(content)
+    if match is None:
+        return None
+    weekday, day, month, year, hour, minute, second, zone = match.groups()
+    try:
+        weekday = WEEKDAYS[weekday.lower()]
+        month = MONTHS[month.lower()]
+    except KeyError:
+        return None
+    if zone.lower() not in ('gmt', 'utc'):
+        return None
+    try:
+        date = datetime(
+            int(year), month, int(day), int(hour), int(minute), int(second),
+            tzinfo=timezone.utc,
+        )
+    except ValueError:
+        return None
+    if date.weekday() != weekday:
+        return None
+    return date
+
+
+def fast_parse_set_cookie_param(name, value):
+    # Returns the parsed value of a Set-Cookie param or None if the param can
+    # not be handled by the fast parser.
+    if name in ('secure', 'http_only'):
+        return True if value is None else None
+    if value is None:
+        return None
+    if name == 'expires':
+        return fast_parse_date(value)
+    if name == 'max_age':
+        return int(value) if INT_RE.fullmatch(value) else None
+    if name == 'path' and not value.startswith('"'):
+        return value if PATH_RE.fullmatch(value) else None
+    match = VALUE_RE.fullmatch(value)
+    if match is None:
+        return None
+    value, string = match.groups()
+    if name == 'same_site':
+        value = normalize_enum(value) if value is not None else None
+        return value if value in SAME_SITE else None
+    return unescape(string) if value is None else value
+
+
+def fast_parse_set_cookie(content):
+    match = SET_COOKIE_RE.match(content)
+    if match is None:
+        return None
+    cookie_name, cookie_value, string = match.groups()
+    if cookie_value is None:
+        cookie_value = unescape(string)
+    params = {'secure': False, 'http_only': False}
+    index = match.end()
+    while index < len(content):
+        match = SET_COOKIE_PARAM_RE.match(content, index)
+        if match is None:
+            return None
+        name, value = match.groups()
+        try:
+            name = SET_COOKIE_PARAMS[normalize_enum(name)]
+        except KeyError:
+            return None
+        value = fast_parse_set_cookie_param(name, value)
+        if value is None:
+            return None
+        params[name] = value
+        index = match.end()
+    return cookie_name, cookie_value, params
+
+
+@parser(fast_parse=fast_parse_set_cookie)
 def parse_set_cookie(content):
     content, cookie_name = parse_name(content)
     content, _ = parse_token(content, '=')
@@ -17,35 +17,49 @@ PARAM_TYPES = {
 }
 
 
+def fill_template(template, params):
+    return ''.join([
+        part if isinstance(part, str) else part[1](params[part[0]])
+        for part in template
+    ])
+
+
 class Matcher:
 
     def __init__(self, pattern=''):
         parts = []
         params = []
+        # The template consists of literal strings and (name, serialize)
+        # tuples for params, so reversing does not have to look at the regex.
+        template = []
 
         index = 0
 
         for match in PARAM_RE.finditer(pattern):
             if index != match.start():
                 parts.append(re.escape(pattern[index:match.start()]))
+                template.append(pattern[index:match.start()])
 
             name, param_type = match.groups()
             if param_type is None:
                 param_type = 'str'
             try:
-                param_pattern, _, _ = PARAM_TYPES[param_type]
+                param_pattern, _, serialize = PARAM_TYPES[param_type]
             except KeyError:
                 raise ValueError(f'invalid param type: {param_type}') from None
             parts.append(f'({param_pattern})')
             params.append((name, param_type))
+            template.append((name, serialize))
 
             index = match.end()
 
         if index != len(pattern):
             parts.append(re.escape(pattern[index:]))
+            template.append(pattern[index:])
 
         self.regex = re.compile(r''.join(parts))
         self.params = params
+        self.template = tuple(template)
 
     def __add__(self, other):
         if not isinstance(other, Matcher):
@@ -53,6 +67,7 @@ class Matcher:
         merged = Matcher()
         merged.regex = re.compile(self.regex.pattern + other.regex.pattern)
         merged.params = [*self.params, *other.params]
+        merged.template = self.template + other.template
         return merged
 
     def match(self, path):
@@ -72,30 +87,7 @@ class Matcher:
         return params
 
     def reverse(self, **params):
-        parts = []
-
-        chars = iter(self.regex.pattern)
-        param_index = 0
-        depth = 0
-
-        for char in chars:
-            if char == '(':
-                depth += 1
-            elif char == ')':
-                assert depth > 0
-                depth -= 1
-                if depth == 0:
-                    name, param_type = self.params[param_index]
-                    _, _, serialize = PARAM_TYPES[param_type]
-                    parts.append(serialize(params[name]))
-                    param_index += 1
-                    continue
-            elif char == '\\':
-                char = next(chars)
-            if depth == 0:
-                parts.append(char)
-
-        return ''.join(parts)
+        return fill_template(self.template, params)
 
     class Error(ValueError):
         pass
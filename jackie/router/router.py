@@ -1,6 +1,13 @@
+from collections import namedtuple, OrderedDict
+import re
+from weakref import WeakSet
+
 from ..http import Response
-from ..http.wrappers import jackie_to_asgi, AsgiToJackie, JackieToAsgi
-from .matcher import Matcher
+from ..http.exceptions import Disconnect
+from ..http.wrappers import (
+    AsgiToJackie, JackieToAsgi, get_request, get_socket, send_response,
+)
+from .matcher import Matcher, fill_template
 
 
 async def not_found(request):
@@ -19,31 +26,24 @@ async def websocket_not_found(socket):
     await socket.close()
 
 
-class ResolvedView(AsgiToJackie):
+class ResolvedView:
 
-    def __init__(self, router, name, params, view):
-        super().__init__(ResolvedApp(self))
+    def __init__(self, router, name, view):
         self.router = router
         self.name = name
-        self.params = params
         self.view = view
 
     async def __call__(self, request, **params):
         request.router = self.router
         request.view_name = self.name
-        return await self.view(request, **self.params)
-
+        if params:
+            request.view_params = {**request.view_params, **params}
+        return await self.view(request, **request.view_params)
 
-class ResolvedApp(JackieToAsgi):
 
-    async def __call__(self, scope, receive, send):
-        app = jackie_to_asgi(self.view.view)
-        scope = {**scope, 'jackie.router': {
-            'router': self.view.router,
-            'name': self.view.name,
-            'params': self.view.params,
-        }}
-        return await app(scope, receive, send)
+CacheInfo = namedtuple(
+    'CacheInfo', ['hits', 'misses', 'evictions', 'maxsize', 'currsize'],
+)
 
 
 class NoView(Exception):
@@ -52,53 +52,109 @@ class NoView(Exception):
         self.allowed_methods = allowed_methods
 
 
+class FallThrough(Exception):
+    # Raised by a view of an included router to let the request be handled
+    # as if that router did not have a route for it.
+
+    def __init__(self, router):
+        self.router = router
+
+
+def get_segments(matcher):
+    # The segments that every path matched by the matcher starts with.
+    template = matcher.template
+    if template and isinstance(template[0], str):
+        return template[0].split('/')[:-1]
+    return []
+
+
+def compile_node(node):
+    children, patterns = node
+    return (
+        {
+            segment: compile_node(child)
+            for segment, child in children.items()
+        },
+        re.compile('|'.join(patterns)) if patterns else None,
+    )
+
+
 class Router(JackieToAsgi):
 
-    def __init__(self):
+    def __init__(self, *, cache_size=0):
         super().__init__(JackieRouter(self))
         self._routes = []
         self._not_found = None
         self._method_not_allowed = None
         self._websocket_not_found = None
         self._middlewares = []
+        self._parents = WeakSet()
+        self._index = None
+        self._chains = {}
+        self._templates = None
+        self._cache = OrderedDict()
+        self._cache_size = cache_size
+        self._cache_hits = 0
+        self._cache_misses = 0
+        self._cache_evictions = 0
 
     # Configuration
 
-    def route(self, methods, matcher, view=None, *, name=None):
+    def route(self, methods, matcher, view=None, *, name=None, cache=True):
         if view is None:
             def decorator(view):
-                self.route(methods, matcher, view, name=name)
+                self.route(methods, matcher, view, name=name, cache=cache)
                 return view
             return decorator
         if isinstance(methods, str):
             methods = {methods}
         if not isinstance(matcher, Matcher):
             matcher = Matcher(matcher)
-        self._routes.append((methods, matcher, view, name))
+        self._routes.append((methods, matcher, view, name, cache))
+        self._invalidate()
         return self
 
-    def include(self, matcher, router, *, name=None):
+    def include(self, matcher, router, *, name=None, cache=True):
         if not isinstance(matcher, Matcher):
             matcher = Matcher(matcher)
-        self._routes.append((None, matcher, router, name))
+        self._routes.append((None, matcher, router, name, cache))
+        router._parents.add(self)
+        self._invalidate()
         return self
 
     def not_found(self, view):
         self._not_found = view
+        self._invalidate()
         return view
 
     def method_not_allowed(self, view):
         self._method_not_allowed = view
+        self._invalidate()
         return view
 
     def websocket_not_found(self, view):
         self._websocket_not_found = view
+        self._invalidate()
         return view
 
-    def middleware(self, middleware):
-        self._middlewares.append(middleware)
+    def middleware(self, middleware=None, *, cache=True):
+        if middleware is None:
+            def decorator(middleware):
+                self.middleware(middleware, cache=cache)
+                return middleware
+            return decorator
+        self._middlewares.append((middleware, cache))
+        self._invalidate()
         return middleware
 
+    def _invalidate(self):
+        self._index = None
+        self._chains = {}
+        self._templates = None
+        self._cache.clear()
+        for parent in self._parents:
+            parent._invalidate()
+
     # Method shorthands
 
     def get(self, *args, **kwargs):
@@ -131,77 +187,247 @@ class Router(JackieToAsgi):
     def websocket(self, *args, **kwargs):
         return self.route('WEBSOCKET', *args, **kwargs)
 
+    # Compilation
+
+    def compile(self):
+        methods = set()
+        for route_methods, _, view, _, _ in self._routes:
+            if route_methods is None:
+                view.compile()
+            else:
+                methods.update(route_methods)
+        self._index = {
+            method: self._compile_method(method)
+            for method in [*methods, None]
+        }
+        self._get_templates()
+        return self
+
+    def _compile_method(self, method):
+        static = {}
+        # Routes that are not static are put in a trie on the leading literal
+        # segments of their pattern, so that a path is only matched against
+        # the routes that share its prefix.
+        root = {}, []
+        for index, (methods, matcher, _, _, _) in enumerate(self._routes):
+            pattern = matcher.regex.pattern
+            if methods is None:
+                pattern = f'(?P<_{index}>{pattern})'
+            elif method not in methods:
+                continue
+            elif matcher.params:
+                pattern = f'(?P<_{index}>{pattern}\\Z)'
+            else:
+                static.setdefault(matcher.reverse(), index)
+                continue
+            node = root
+            for segment in get_segments(matcher):
+                node = node[0].setdefault(segment, ({}, []))
+            node[1].append(pattern)
+        return static, compile_node(root)
+
+    def _find_route(self, method, path):
+        if self._index is None:
+            self.compile()
+        try:
+            static, node = self._index[method]
+        except KeyError:
+            static, node = self._index[None]
+        index = static.get(path)
+        # Only segments that are followed by a slash can be part of a prefix.
+        for segment in [*path.split('/')[:-1], None]:
+            children, regex = node
+            if regex is not None:
+                match = regex.match(path)
+                if match is not None:
+                    regex_index = int(match.lastgroup[1:])
+                    if index is None or regex_index < index:
+                        index = regex_index
+            node = children.get(segment)
+            if node is None:
+                break
+        return index
+
+    # Middleware
+
+    def _build_chain(self, view):
+        # Wraps the view in the innermost middlewares that can be cached, the
+        # remaining middlewares are returned so they can be applied on every
+        # request.
+        middlewares = self._middlewares
+        index = len(middlewares)
+        while index > 0 and middlewares[index - 1][1]:
+            index -= 1
+        for middleware, _ in reversed(middlewares[index:]):
+            view = middleware(view)
+        return view, middlewares[:index]
+
+    def _apply_chain(self, chain):
+        view, middlewares = chain
+        for middleware, _ in reversed(middlewares):
+            view = middleware(view)
+        return view, not middlewares
+
     # Application
 
-    def _get_view(
-        self, method, path,
-        *, base_router=None, base_name='', base_params={},
+    def _get_route_view(
+        self, index, method, path, base_router, base_name, skip=None,
     ):
-        allowed_methods = set()
+        methods, matcher, view, name, cache = self._routes[index]
+
+        if methods is None:
+            params, path = matcher.match(path)
+            view, view_params, shared, view_cache = view._get_view(
+                method, path,
+                base_router=base_router,
+                base_name=(
+                    base_name + name + ':'
+                    if name is not None else
+                    base_name
+                ),
+                skip=skip,
+            )
+            if shared:
+                try:
+                    chain = self._chains[view]
+                except KeyError:
+                    chain = self._chains[view] = self._build_chain(view)
+            else:
+                chain = view, self._middlewares
+            view, shared = self._apply_chain(chain)
+            params = {**params, **view_params}
+            return view, params, shared, cache and view_cache
+
+        params = matcher.fullmatch(path)
+        if method not in methods:
+            raise NoView(methods)
+        key = (base_router, base_name, index)
+        try:
+            chain = self._chains[key]
+        except KeyError:
+            chain = self._chains[key] = self._build_chain(ResolvedView(
+                router=base_router,
+                name=base_name + name if name is not None else None,
+                view=view,
+            ))
+        view, shared = self._apply_chain(chain)
+        return view, params, shared, cache
 
+    def _get_view(
+        self, method, path, *, base_router=None, base_name='', skip=None,
+    ):
         if base_router is None:
             base_router = self
 
-        for methods, matcher, view, name in self._routes:
-            if methods is None:
-                try:
-                    params, path = matcher.match(path)
-                except Matcher.Error:
-                    continue
-                try:
-                    view = view._get_view(
-                        method, path,
-                        base_router=base_router,
-                        base_name=(
-                            base_name + name + ':'
-                            if name is not None else
-                            base_name
-                        ),
-                        base_params={**base_params, **params},
-                    )
-                except NoView as no_view:
-                    methods = no_view.allowed_methods
-                else:
-                    break
-            else:
-                try:
-                    params = matcher.fullmatch(path)
-                except Matcher.Error:
-                    continue
-                if method in methods:
-                    view = ResolvedView(
-                        router=base_router,
-                        name=base_name + name if name is not None else None,
-                        params={**base_params, **params},
-                        view=view,
-                    )
-                    break
-            allowed_methods.update(methods)
+        if self is skip:
+            return self._no_view(method, set(), base_router, base_name)
+
+        # The compiled index gives us the first route that can possibly handle
+        # this request. Only when this is an include that does not have a
+        # view for the path we fall back to scanning all routes.
+        index = self._find_route(method, path)
+        if index is None:
+            # Includes are in the index of every method, so no include matches
+            # the path and the allowed methods can be found in the indexes of
+            # the other methods.
+            allowed_methods = {
+                other_method
+                for other_method in self._index
+                if other_method is not None and
+                other_method != method and
+                self._find_route(other_method, path) is not None
+            }
+            return self._no_view(
+                method, allowed_methods, base_router, base_name,
+            )
+        try:
+            return self._get_route_view(
+                index, method, path, base_router, base_name, skip,
+            )
+        except (Matcher.Error, NoView):
+            pass
+
+        return self._scan_routes(method, path, base_router, base_name, skip)
+
+    def _scan_routes(self, method, path, base_router, base_name, skip=None):
+        allowed_methods = set()
+
+        for index in range(len(self._routes)):
+            try:
+                return self._get_route_view(
+                    index, method, path, base_router, base_name, skip,
+                )
+            except Matcher.Error:
+                continue
+            except NoView as no_view:
+                allowed_methods.update(no_view.allowed_methods)
+
+        return self._no_view(method, allowed_methods, base_router, base_name)
+
+    def _no_view(self, method, allowed_methods, base_router, base_name):
+        if method == 'WEBSOCKET':
+            key = 'websocket_not_found'
+            view = self._websocket_not_found
+            params = {}
+            if view is None and base_router is self:
+                view = websocket_not_found
+        elif allowed_methods:
+            key = 'method_not_allowed'
+            view = self._method_not_allowed
+            params = {'methods': allowed_methods}
+            if view is None and base_router is self:
+                view = method_not_allowed
         else:
-            if method == 'WEBSOCKET':
-                view = self._websocket_not_found
-                params = {**base_params}
-                if view is None and base_router is self:
-                    view = websocket_not_found
-            elif allowed_methods:
-                view = self._method_not_allowed
-                params = {**base_params, 'methods': allowed_methods}
-                if view is None and base_router is self:
-                    view = method_not_allowed
-            else:
-                view = self._not_found
-                params = {**base_params}
-                if view is None and base_router is self:
-                    view = not_found
-            if view is not None:
-                view = ResolvedView(base_router, None, params, view)
+            key = 'not_found'
+            view = self._not_found
+            params = {}
+            if view is None and base_router is self:
+                view = not_found
 
         if view is None:
             raise NoView(allowed_methods)
 
-        for middleware in reversed(self._middlewares):
-            view = middleware(view)
-        return view
+        key = (base_router, base_name, key)
+        try:
+            chain = self._chains[key]
+        except KeyError:
+            chain = self._chains[key] = self._build_chain(
+                ResolvedView(base_router, None, view),
+            )
+        view, shared = self._apply_chain(chain)
+        return view, params, shared, False
+
+    def _resolve(self, method, path):
+        if not self._cache_size:
+            view, params, _, _ = self._get_view(method, path)
+            return view, params
+
+        key = (method, path)
+        try:
+            view, params = self._cache[key]
+        except KeyError:
+            self._cache_misses += 1
+        else:
+            self._cache_hits += 1
+            self._cache.move_to_end(key)
+            return view, {**params}
+
+        view, params, shared, cache = self._get_view(method, path)
+        if shared and cache:
+            self._cache[key] = view, {**params}
+            if len(self._cache) > self._cache_size:
+                self._cache.popitem(last=False)
+                self._cache_evictions += 1
+        return view, params
+
+    def cache_info(self):
+        return CacheInfo(
+            hits=self._cache_hits,
+            misses=self._cache_misses,
+            evictions=self._cache_evictions,
+            maxsize=self._cache_size,
+            currsize=len(self._cache),
+        )
 
     async def __call__(self, scope, receive, send):
         if scope['type'] == 'http':
@@ -210,30 +436,77 @@ class Router(JackieToAsgi):
             method = 'WEBSOCKET'
         else:
             raise ValueError(f'unsupported scope type: {scope["type"]}')
-        app = jackie_to_asgi(self._get_view(method, scope['path']))
-        return await app(scope, receive, send)
 
-    def _get_matcher(self, name):
-        for methods, matcher, view, name_ in self._routes:
-            if methods is None:
-                if name_ is not None and not name.startswith(name_ + ':'):
-                    continue
-                try:
-                    return matcher + view._get_matcher(
-                        name if name_ is None else name[len(name_) + 1:],
-                    )
-                except ValueError:
-                    pass
-            elif name_ == name:
-                return matcher
-        raise ValueError('unknown name')
+        view, params = self._resolve(method, scope['path'])
+
+        if (
+            isinstance(view, ResolvedView) and
+            isinstance(view.view, AsgiToJackie)
+        ):
+            # ASGI apps that are not wrapped in middleware are called directly
+            # so that they get the original connection.
+            app = view.view.app
+            scope = {**scope, 'jackie.router': {
+                'router': view.router,
+                'name': view.name,
+                'params': params,
+            }}
+            return await app(scope, receive, send)
+
+        if scope['type'] == 'http':
+            request = get_request(scope, receive)
+            request.view_params = params
+            try:
+                response = await self._call_view(view, request)
+                await send_response(response, scope, send)
+            except Disconnect:
+                pass
+        else:
+            socket = await get_socket(scope, receive, send)
+            socket.view_params = params
+            return await view(socket)
+
+    async def _call_view(self, view, request):
+        try:
+            return await view(request)
+        except FallThrough as fall_through:
+            # The view does not handle the request after all, so it is routed
+            # again as if the router that raised did not have a route for it.
+            view, request.view_params, _, _ = self._get_view(
+                request.method, request.path, skip=fall_through.router,
+            )
+            return await view(request)
+
+    # Reversing
+
+    def _get_templates(self):
+        if self._templates is None:
+            templates = {}
+            for methods, matcher, view, name, _ in self._routes:
+                if methods is None:
+                    prefix = '' if name is None else name + ':'
+                    for view_name, template in view._get_templates().items():
+                        templates.setdefault(
+                            prefix + view_name,
+                            matcher.template + template,
+                        )
+                elif name is not None:
+                    templates.setdefault(name, matcher.template)
+            self._templates = templates
+        return self._templates
 
     def reverse(self, name, **params):
-        return self._get_matcher(name).reverse(**params)
+        try:
+            template = self._get_templates()[name]
+        except KeyError:
+            raise ValueError('unknown name') from None
+        return fill_template(template, params)
 
 
 class JackieRouter(AsgiToJackie):
 
     async def __call__(self, request, **params):
-        view = self.app._get_view(request.method, request.path)
-        return await view(request, **params)
+        view, request.view_params = self.app._resolve(
+            request.method, request.path,
+        )
+        return await self.app._call_view(view, request)
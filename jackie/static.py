@@ -0,0 +1,183 @@
+import asyncio
+from collections import OrderedDict
+import mimetypes
+import os
+import stat as stat_module
+import time
+
+from .http import Response
+from .http.response import get_validators
+from .http.stream import SendFile
+from .parse import parse_accept_encoding
+from .router import Router
+from .router.router import FallThrough
+
+
+CACHE_SIZE = 1024
+CACHE_TTL = 1.0
+# Files up to this size are kept in memory, bigger files are sent from disk.
+MEMORY_SIZE = 65536
+# The total size of the contents in the cache, least recently used files are
+# dropped from the cache when this is exceeded.
+CACHE_MEMORY_SIZE = 16 * 1024 * 1024
+# Precompressed siblings of a file in order of preference.
+ENCODINGS = [('br', '.br'), ('gzip', '.gz')]
+
+
+def get_memory(variants):
+    return sum(
+        len(content)
+        for _, _, content, _ in variants.values()
+        if content is not None
+    )
+
+
+class Static(Router):
+
+    def __init__(
+        self, directory, *, cache_size=CACHE_SIZE, cache_ttl=CACHE_TTL,
+        memory_size=MEMORY_SIZE, cache_memory_size=CACHE_MEMORY_SIZE,
+        precompressed=True,
+    ):
+        super().__init__()
+        self.directory = os.path.realpath(directory)
+        self.cache_size = cache_size
+        self.cache_ttl = cache_ttl
+        self.memory_size = memory_size
+        self.cache_memory_size = cache_memory_size
+        self.precompressed = precompressed
+        self._files = OrderedDict()
+        self._memory = 0
+        self.route({'GET', 'HEAD'}, '/<path:path>', self._serve)
+
+    async def _serve(self, request, path):
+        variants = await self._get_variants(path)
+        if variants is None:
+            # Missing files are handled like paths without a route, so the
+            # not found view of the including routers is used.
+            raise FallThrough(self)
+
+        encoding = None
+        if len(variants) > 1:
+            try:
+                accepted = parse_accept_encoding(
+                    request.headers.get('Accept-Encoding', ''),
+                )
+            except ValueError:
+                accepted = {}
+            for variant_encoding, _ in ENCODINGS:
+                if variant_encoding in variants and accepted.get(
+                    variant_encoding, accepted.get('*', 0),
+                ) > 0:
+                    encoding = variant_encoding
+                    break
+
+        file_path, headers, content, _ = variants[encoding]
+        if content is None:
+            return Response(body=[SendFile(file_path)], headers=headers)
+        return Response(body=content, headers=headers)
+
+    async def _get_variants(self, path):
+        now = time.monotonic()
+        try:
+            timestamp, cached = self._files[path]
+        except KeyError:
+            cached = {}
+        else:
+            if now - timestamp < self.cache_ttl:
+                self._files.move_to_end(path)
+                return cached
+
+        # Loading touches the filesystem so it is done in a thread to not
+        # block the event loop.
+        variants = await asyncio.get_event_loop().run_in_executor(
+            None, self._load_variants, path, cached,
+        )
+        self._uncache(path)
+        if variants is None:
+            # Misses are not cached so that requests for random paths can not
+            # push existing files out of the cache.
+            return None
+        self._files[path] = now, variants
+        self._memory += get_memory(variants)
+        while self._files and (
+            len(self._files) > self.cache_size or
+            self._memory > self.cache_memory_size
+        ):
+            self._uncache(next(iter(self._files)))
+        return variants
+
+    def _uncache(self, path):
+        try:
+            _, variants = self._files.pop(path)
+        except KeyError:
+            return
+        self._memory -= get_memory(variants)
+
+    def _load_variants(self, path, cached):
+        parts = path.split('/')
+        if any(
+            part in ('', '.', '..') or
+            '\0' in part or
+            os.sep in part or
+            (os.altsep is not None and os.altsep in part)
+            for part in parts
+        ):
+            return None
+        file_path = os.path.join(self.directory, *parts)
+        content_type, _ = mimetypes.guess_type(file_path)
+
+        variant = self._load_variant(
+            file_path, content_type, None, cached.get(None),
+        )
+        if variant is None:
+            return None
+        variants = {None: variant}
+
+        if self.precompressed:
+            for encoding, suffix in ENCODINGS:
+                variant = self._load_variant(
+                    file_path + suffix, content_type, encoding,
+                    cached.get(encoding),
+                )
+                if variant is not None:
+                    variants[encoding] = variant
+            if len(variants) > 1:
+                for _, headers, _, _ in variants.values():
+                    headers.append(('Vary', 'Accept-Encoding'))
+
+        return variants
+
+    def _load_variant(self, file_path, content_type, encoding, cached):
+        # Symlinks are allowed as long as they do not point outside of the
+        # directory.
+        file_path = os.path.realpath(file_path)
+        if os.path.commonpath([self.directory, file_path]) != self.directory:
+            return None
+        try:
+            stat = os.stat(file_path)
+        except OSError:
+            return None
+        if not stat_module.S_ISREG(stat.st_mode):
+            return None
+
+        etag, last_modified = get_validators(stat)
+        headers = [('ETag', etag), ('Last-Modified', last_modified)]
+        if content_type is not None:
+            headers.append(('Content-Type', content_type))
+        if encoding is not None:
+            headers.append(('Content-Encoding', encoding))
+
+        # The content is only read again when the file has changed.
+        key = stat.st_ino, stat.st_mtime_ns, stat.st_size
+        if stat.st_size > self.memory_size:
+            headers.append(('Accept-Ranges', 'bytes'))
+            return file_path, headers, None, key
+        if cached is not None and cached[3] == key and cached[2] is not None:
+            return file_path, headers, cached[2], key
+        try:
+            with open(file_path, 'rb') as f:
+                content = f.read()
+        except OSError:
+            return None
+        return file_path, headers, content, key
@@ -1,8 +1,10 @@
+import gzip
 import tempfile
+import zlib
 
 import pytest
 
-from jackie.http import Request
+from jackie.http import LimitExceeded, Request
 from jackie.multipart import File
 
 
@@ -41,6 +43,76 @@ async def test_form_request():
     assert data['baz'].content == b'pngcontent'
 
 
+@pytest.mark.asyncio
+async def test_form_request_does_not_retain_chunks():
+    cache_sizes = []
+
+    async def chunks():
+        yield (
+            b'--boundary\n'
+            b'Content-Disposition: form-data; name=foo; filename=foo.txt\n'
+            b'Content-Type: text/plain\n'
+            b'\n'
+        )
+        for _ in range(1024):
+            cache_sizes.append(len(request._cache))
+            yield b'x' * 1024
+        yield b'\n--boundary--\n'
+
+    request = Request(body=chunks(), headers={
+        'Content-Type': 'multipart/form-data; boundary=boundary',
+    })
+    data = await request.form(spool_size=1024)
+    assert data['foo'].content == b'x' * 1024 * 1024
+    # Only the chunk that is being parsed is kept around.
+    assert max(cache_sizes) <= 1
+    assert request._cache == []
+
+    # The parsed form is kept so it can be read again, for example by both a
+    # middleware and a view.
+    data['bar'] = 'baz'
+    data = await request.form()
+    assert list(data) == ['foo']
+    assert data['foo'].content == b'x' * 1024 * 1024
+
+    with pytest.raises(ValueError) as exc_info:
+        await request.body()
+    assert str(exc_info.value) == (
+        'stream has already been consumed without caching its chunks'
+    )
+
+
+@pytest.mark.asyncio
+async def test_parts_request_does_not_retain_chunks():
+    cache_sizes = []
+
+    async def chunks():
+        for name in ['foo', 'bar']:
+            yield (
+                b'--boundary\n'
+                b'Content-Disposition: form-data; name=' + name.encode() +
+                b'\n\n'
+            )
+            for _ in range(1024):
+                cache_sizes.append(len(request._cache))
+                yield b'x' * 1024
+            yield b'\n'
+        yield b'--boundary--\n'
+
+    request = Request(body=chunks(), headers={
+        'Content-Type': 'multipart/form-data; boundary=boundary',
+    })
+    sizes = {}
+    async for part in request.parts():
+        sizes[part.name] = 0
+        async for chunk in part.chunks():
+            sizes[part.name] += len(chunk)
+    assert sizes == {'foo': 1024 * 1024, 'bar': 1024 * 1024}
+    # Only the chunk that is being parsed is kept around.
+    assert max(cache_sizes) <= 1
+    assert request._cache == []
+
+
 @pytest.mark.asyncio
 async def test_json_request():
     request = Request(json={'foo': 'bar'})
@@ -85,3 +157,111 @@ def test_cookies():
         'foo': 'bar',
         'bar': 'baz"qux',
     }
+    request.cookies['foo'] = 'baz'
+    assert request.cookies['foo'] == 'bar'
+    request.headers['Cookie'] = 'foo=baz'
+    assert request.cookies == {'foo': 'baz'}
+
+
+def test_content_type_changed():
+    request = Request(headers={
+        'Content-Type': 'text/plain; charset=latin-1',
+    })
+    assert request.content_type == 'text/plain'
+    assert request.charset == 'latin-1'
+    request.headers['Content-Type'] = 'application/json'
+    assert request.content_type == 'application/json'
+    assert request.charset == 'UTF-8'
+
+
+@pytest.mark.asyncio
+async def test_request_not_replayable():
+    request = Request(body=[b'foo', b'bar'], replayable=False)
+    assert await request.body() == b'foobar'
+    with pytest.raises(ValueError):
+        await request.body()
+
+
+@pytest.mark.asyncio
+async def test_request_decompress():
+    data = gzip.compress(b'{"foo": "bar"}')
+    request = Request(
+        body=[data[:5], data[5:]],
+        headers={
+            'Content-Type': 'application/json',
+            'Content-Encoding': 'gzip',
+        },
+    )
+    assert await request.json() == {'foo': 'bar'}
+    chunks = []
+    async for chunk in request.chunks(decompress=False):
+        chunks.append(chunk)
+    assert b''.join(chunks) == data
+
+    request = Request(body=zlib.compress(b'foo=bar'), headers={
+        'Content-Type': 'application/x-www-form-urlencoded',
+        'Content-Encoding': 'deflate',
+    })
+    assert (await request.form())['foo'] == 'bar'
+
+    request = Request(body=b'foo', headers={'Content-Encoding': 'identity'})
+    assert await request.body() == b'foo'
+
+    request = Request(
+        body=gzip.compress(zlib.compress(b'foo')),
+        headers={'Content-Encoding': 'deflate, gzip'},
+    )
+    assert await request.body() == b'foo'
+
+    # Empty bodies are empty whatever their encoding.
+    request = Request(headers={'Content-Encoding': 'gzip'})
+    assert await request.body() == b''
+
+    # Unsupported encodings are passed on as they were received.
+    for encoding in ['br', 'compress', 'gzip, br']:
+        request = Request(body=b'foo', headers={'Content-Encoding': encoding})
+        assert await request.body() == b'foo'
+
+
+@pytest.mark.asyncio
+async def test_request_decompress_invalid():
+    for encoding, body in [
+        ('gzip', b'foo'),
+        ('gzip', gzip.compress(b'foo')[:-4]),
+        ('gzip', gzip.compress(b'foo') + b'bar'),
+    ]:
+        request = Request(body=body, headers={'Content-Encoding': encoding})
+        with pytest.raises(ValueError):
+            await request.body()
+
+
+@pytest.mark.asyncio
+async def test_request_decompress_limit():
+    data = gzip.compress(b'\0' * 1024 * 1024)
+    request = Request(
+        body=data,
+        headers={'Content-Encoding': 'gzip'},
+        max_decompressed_size=1024,
+    )
+    with pytest.raises(LimitExceeded):
+        await request.body()
+
+    request = Request(body=data, headers={'Content-Encoding': 'gzip'})
+    with pytest.raises(LimitExceeded):
+        await request.body(max_size=1024)
+    assert len(await request.body()) == 1024 * 1024
+
+
+def test_request_query_string():
+    request = Request(query_string=b'foo=1&foo=2&bar=%20')
+    assert request._query is None
+    assert request.query_string == b'foo=1&foo=2&bar=%20'
+    assert request.query.getlist('foo') == ['1', '2']
+    assert request.query['bar'] == ' '
+    request.query['bar'] = 'baz'
+    assert request.query_string == b'foo=1&foo=2&bar=baz'
+
+    request = Request(query={'foo': 'bar'})
+    assert request.query_string == b'foo=bar'
+    request.query = [('bar', 'baz')]
+    assert request.query_string == b'bar=baz'
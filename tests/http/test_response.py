@@ -1,8 +1,12 @@
+import os
 import tempfile
 
 import pytest
 
 from jackie.http import Response, Cookie
+from jackie.http import response as response_module
+from jackie.http.response import conditional_response, range_response
+from jackie.multidict import Headers
 from jackie.multipart import File
 
 
@@ -152,3 +156,160 @@ async def test_file_response_unknown_type():
         assert response.content_type is None
         assert await response.body() == b'foobar'
         assert await response.text() == 'foobar'
+
+
+@pytest.mark.asyncio
+async def test_range_response():
+    with tempfile.NamedTemporaryFile(suffix='.txt') as f:
+        f.write(b'foobarbaz')
+        f.flush()
+
+        response = Response(file=f.name)
+        assert response.headers['Accept-Ranges'] == 'bytes'
+
+        partial = range_response(response, 'bytes=3-5')
+        assert partial.status == 206
+        assert partial.headers['Content-Range'] == 'bytes 3-5/9'
+        assert partial.content_type == 'text/plain'
+        assert await partial.body() == b'bar'
+
+        partial = range_response(response, 'bytes=6-')
+        assert partial.headers['Content-Range'] == 'bytes 6-8/9'
+        assert await partial.body() == b'baz'
+
+        partial = range_response(response, 'bytes=-4')
+        assert partial.headers['Content-Range'] == 'bytes 5-8/9'
+        assert await partial.body() == b'rbaz'
+
+        partial = range_response(response, 'bytes=7-100')
+        assert partial.headers['Content-Range'] == 'bytes 7-8/9'
+        assert await partial.body() == b'az'
+
+        partial = range_response(response, 'bytes=0-2, 6-8')
+        assert partial.status == 206
+        assert partial.content_type == 'multipart/byteranges'
+        boundary = partial.boundary
+        assert await partial.body() == (
+            f'--{boundary}\r\n'
+            'Content-Type: text/plain\r\n'
+            'Content-Range: bytes 0-2/9\r\n'
+            '\r\n'
+            'foo\r\n'
+            f'--{boundary}\r\n'
+            'Content-Type: text/plain\r\n'
+            'Content-Range: bytes 6-8/9\r\n'
+            '\r\n'
+            'baz\r\n'
+            f'--{boundary}--\r\n'
+        ).encode()
+
+        partial = range_response(response, 'bytes=9-')
+        assert partial.status == 416
+        assert partial.headers['Content-Range'] == 'bytes */9'
+        assert await partial.body() == b''
+
+        assert range_response(response, 'bytes=5-3') is response
+        assert range_response(response, 'lines=1-2') is response
+
+        response = Response(status=404, file=f.name)
+        assert range_response(response, 'bytes=3-5') is response
+
+    response = Response(text='foobarbaz')
+    assert range_response(response, 'bytes=3-5') is response
+
+
+@pytest.mark.asyncio
+async def test_range_response_many_ranges(monkeypatch):
+    with tempfile.NamedTemporaryFile(suffix='.txt') as f:
+        f.write(b'foobarbaz')
+        f.flush()
+        response = Response(file=f.name)
+
+        # Overlapping and adjacent ranges are merged.
+        partial = range_response(response, 'bytes=' + ', '.join(['0-'] * 100))
+        assert partial.status == 206
+        assert partial.headers['Content-Range'] == 'bytes 0-8/9'
+        assert await partial.body() == b'foobarbaz'
+
+        partial = range_response(response, 'bytes=6-7, 0-1, 1-2, 8-8')
+        assert partial.content_type == 'multipart/byteranges'
+        body = await partial.body()
+        assert b'Content-Range: bytes 0-2/9\r\n\r\nfoo\r\n' in body
+        assert b'Content-Range: bytes 6-8/9\r\n\r\nbaz\r\n' in body
+        assert body.count(b'Content-Range') == 2
+
+        # Too many ranges get the full response.
+        monkeypatch.setattr('jackie.http.response.MAX_RANGES', 2)
+        assert range_response(response, 'bytes=0-0, 2-2, 4-4') is response
+        partial = range_response(response, 'bytes=0-0, 2-2')
+        assert partial.status == 206
+
+
+@pytest.mark.asyncio
+async def test_conditional_response():
+    with tempfile.NamedTemporaryFile(suffix='.txt') as f:
+        f.write(b'foobarbaz')
+        f.flush()
+        os.utime(f.name, (1614600005, 1614600005))
+        response_module.STAT_CACHE.clear()
+
+        response = Response(
+            file=f.name,
+            headers={'Cache-Control': 'no-cache'},
+        )
+        stat = os.stat(f.name)
+        etag = f'"{stat.st_ino:x}-{stat.st_mtime_ns:x}-{stat.st_size:x}"'
+        assert response.headers['ETag'] == etag
+        assert response.headers['Last-Modified'] == (
+            'Mon, 1 Mar 2021 12:00:05 GMT'
+        )
+
+        for headers in [
+            {'If-None-Match': etag},
+            {'If-None-Match': f'"foo", W/{etag}'},
+            {'If-None-Match': '*'},
+            {'If-Modified-Since': 'Mon, 1 Mar 2021 12:00:05 GMT'},
+            {'If-Modified-Since': 'Tue, 2 Mar 2021 12:00:05 GMT'},
+        ]:
+            not_modified = conditional_response(response, Headers(headers))
+            assert not_modified.status == 304
+            assert not_modified.headers['ETag'] == etag
+            assert not_modified.headers['Cache-Control'] == 'no-cache'
+            assert 'Content-Type' not in not_modified.headers
+            assert await not_modified.body() == b''
+
+        for headers in [
+            {},
+            {'If-None-Match': '"foo"'},
+            {
+                'If-None-Match': '"foo"',
+                'If-Modified-Since': 'Mon, 1 Mar 2021 12:00:05 GMT',
+            },
+            {'If-Modified-Since': 'Sun, 28 Feb 2021 12:00:05 GMT'},
+            {'If-Modified-Since': 'yesterday'},
+            {'Range': 'bytes=3-5', 'If-Range': '"foo"'},
+        ]:
+            assert conditional_response(response, Headers(headers)) is (
+                response
+            )
+
+        for if_range in [etag, 'Mon, 1 Mar 2021 12:00:05 GMT']:
+            partial = conditional_response(response, Headers({
+                'Range': 'bytes=3-5',
+                'If-Range': if_range,
+            }))
+            assert partial.status == 206
+            assert await partial.body() == b'bar'
+
+
+def test_stat_cache(monkeypatch):
+    with tempfile.NamedTemporaryFile(suffix='.txt') as f:
+        response_module.STAT_CACHE.clear()
+        etag = Response(file=f.name).headers['ETag']
+
+        f.write(b'foobar')
+        f.flush()
+        assert Response(file=f.name).headers['ETag'] == etag
+
+        monkeypatch.setattr(response_module, 'STAT_CACHE_TTL', 0)
+        assert Response(file=f.name).headers['ETag'] != etag
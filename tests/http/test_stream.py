@@ -3,7 +3,8 @@ import tempfile
 
 import pytest
 
-from jackie.http.stream import Stream, SendFile
+from jackie.http import LimitExceeded
+from jackie.http.stream import Stream, SendFile, MIN_CHUNK_SIZE
 
 
 # Very simple stream implementation that allows us to specify the content type
@@ -169,6 +170,61 @@ async def test_stream_multiple_chunks():
         await chunks2.__anext__()
 
 
+@pytest.mark.asyncio
+async def test_stream_caches_chunks():
+    stream = ContentTypeStream([b'foo', b'bar'])
+    assert await stream.body() == b'foobar'
+    assert stream._cache == [b'foo', b'bar']
+    assert await stream.body() == b'foobar'
+
+
+@pytest.mark.asyncio
+async def test_stream_not_replayable():
+    stream = ContentTypeStream([b'foo', b'bar', b'baz'])
+    chunks = stream.chunks()
+    assert await chunks.__anext__() == b'foo'
+    stream.replayable = False
+    assert await chunks.__anext__() == b'bar'
+    assert stream._cache == []
+    assert await chunks.__anext__() == b'baz'
+    assert stream._cache == []
+    with pytest.raises(StopAsyncIteration):
+        await chunks.__anext__()
+
+    with pytest.raises(ValueError) as exc_info:
+        await stream.body()
+    assert str(exc_info.value) == (
+        'stream is not replayable and has already been consumed'
+    )
+
+
+@pytest.mark.asyncio
+async def test_stream_not_replayable_consumed_twice():
+    stream = ContentTypeStream([b'foo', b'bar'])
+    stream.replayable = False
+    chunks = stream.chunks()
+    assert await chunks.__anext__() == b'foo'
+    with pytest.raises(ValueError) as exc_info:
+        await stream.body()
+    assert str(exc_info.value) == (
+        'stream is not replayable and has already been consumed'
+    )
+    assert await chunks.__anext__() == b'bar'
+
+
+@pytest.mark.asyncio
+async def test_stream_error():
+    async def chunks():
+        yield b'foo'
+        raise ValueError('test exception')
+
+    stream = ContentTypeStream(chunks())
+    for _ in range(2):
+        with pytest.raises(ValueError) as exc_info:
+            await stream.body()
+        assert str(exc_info.value) == 'test exception'
+
+
 @pytest.mark.asyncio
 async def test_parse_form_multipart():
     stream = ContentTypeStream(
@@ -219,6 +275,135 @@ async def test_parse_form_incorrect_content_type():
         await stream.form()
 
 
+@pytest.mark.asyncio
+async def test_parts():
+    stream = ContentTypeStream(
+        body=[
+            b'--boundary\n'
+            b'Content-Disposition: form-data; name=foo\n'
+            b'\n'
+            b'123\n'
+            b'--boundary\n'
+            b'Content-Disposition: form-data; name=bar; filename=bar.txt\n'
+            b'Content-Type: text/plain; charset=ASCII\n'
+            b'\n'
+            b'456',
+            b'789\n'
+            b'--boundary\n'
+            b'Content-Disposition: form-data; name=baz\n'
+            b'\n'
+            b'skipped\n'
+            b'--boundary--\n',
+        ],
+        content_type='multipart/form-data; boundary=boundary',
+    )
+    parts = []
+    async for part in stream.parts():
+        parts.append(part)
+        if part.name == 'foo':
+            assert part.file_name is None
+            assert part.content_type is None
+            assert await part.text() == '123'
+        elif part.name == 'bar':
+            assert part.file_name == 'bar.txt'
+            assert part.content_type == 'text/plain'
+            assert part.charset == 'ASCII'
+            assert part.headers['Content-Type'] == (
+                'text/plain; charset=ASCII'
+            )
+            chunks = [chunk async for chunk in part.chunks()]
+            assert b''.join(chunks) == b'456789'
+    assert [part.name for part in parts] == ['foo', 'bar', 'baz']
+    with pytest.raises(ValueError) as exc_info:
+        await parts[2].body()
+    assert str(exc_info.value) == 'part has already been read'
+
+
+@pytest.mark.asyncio
+async def test_parts_incorrect_content_type():
+    stream = ContentTypeStream(
+        body=b'foo=123&bar=456&baz=789',
+        content_type='application/x-www-form-urlencoded',
+    )
+    with pytest.raises(ValueError):
+        async for _ in stream.parts():
+            pass
+
+
+@pytest.mark.asyncio
+async def test_body_max_size():
+    received = []
+
+    async def chunks():
+        for chunk in [b'foo', b'bar', b'baz']:
+            received.append(chunk)
+            yield chunk
+
+    stream = ContentTypeStream(chunks())
+    with pytest.raises(LimitExceeded) as exc_info:
+        await stream.body(max_size=5)
+    assert str(exc_info.value) == 'body exceeds max size of 5 bytes'
+    assert received == [b'foo', b'bar']
+
+    stream = ContentTypeStream(b'"foobar"')
+    assert await stream.text(max_size=8) == '"foobar"'
+    assert await stream.json(max_size=8) == 'foobar'
+    with pytest.raises(LimitExceeded):
+        await stream.json(max_size=7)
+
+
+@pytest.mark.asyncio
+async def test_form_limits():
+    stream = ContentTypeStream(
+        body=(
+            b'--boundary\n'
+            b'Content-Disposition: form-data; name=foo\n'
+            b'\n'
+            b'123\n'
+            b'--boundary\n'
+            b'Content-Disposition: form-data; name=bar\n'
+            b'\n'
+            b'456789\n'
+            b'--boundary--\n'
+        ),
+        content_type='multipart/form-data; boundary=boundary',
+    )
+    assert await stream.form(
+        max_size=200, max_parts=2, max_header_size=42, max_field_size=6,
+    ) == {'foo': '123', 'bar': '456789'}
+
+    with pytest.raises(LimitExceeded) as exc_info:
+        await stream.form(max_size=100)
+    assert str(exc_info.value) == 'body exceeds max size of 100 bytes'
+
+    with pytest.raises(LimitExceeded) as exc_info:
+        await stream.form(max_parts=1)
+    assert str(exc_info.value) == 'form data exceeds max parts of 1'
+
+    with pytest.raises(LimitExceeded) as exc_info:
+        await stream.form(max_header_size=41)
+    assert str(exc_info.value) == (
+        'form data part headers exceed max size of 41 bytes'
+    )
+
+    with pytest.raises(LimitExceeded) as exc_info:
+        await stream.form(max_field_size=5)
+    assert str(exc_info.value) == (
+        'form data field exceeds max size of 5 bytes'
+    )
+
+    with pytest.raises(LimitExceeded):
+        async for _ in stream.parts(max_parts=1):
+            pass
+
+    stream = ContentTypeStream(
+        body=b'foo=123&bar=456',
+        content_type='application/x-www-form-urlencoded',
+    )
+    with pytest.raises(LimitExceeded):
+        await stream.form(max_size=10)
+
+
 def test_parse_no_content_type():
     stream = ContentTypeStream(content_type=None)
     assert stream.content_type is None
@@ -307,3 +492,69 @@ async def test_send_file_size():
         send_file = SendFile(f.name, size=3)
         chunks = [chunk async for chunk in send_file.chunks(chunk_size=-1)]
         assert chunks == [b'foo']
+
+
+@pytest.mark.asyncio
+async def test_send_file_adaptive_chunks():
+    with tempfile.NamedTemporaryFile() as f:
+        f.write(b'x' * (MIN_CHUNK_SIZE * 3 + 1))
+        f.flush()
+
+        send_file = SendFile(f.name)
+        chunks = [chunk async for chunk in send_file.chunks()]
+        assert [len(chunk) for chunk in chunks] == [
+            MIN_CHUNK_SIZE, MIN_CHUNK_SIZE * 2, 1,
+        ]
+
+
+@pytest.mark.asyncio
+async def test_stream_chunks_no_cache():
+    async def chunks():
+        for chunk in [b'foo', b'bar', b'baz']:
+            assert stream._cache == []
+            yield chunk
+
+    stream = ContentTypeStream(chunks())
+    assert [chunk async for chunk in stream.chunks(cache=False)] == [
+        b'foo', b'bar', b'baz',
+    ]
+    assert stream.replayable
+    with pytest.raises(ValueError):
+        stream.chunks()
+
+    # Chunks that are in memory already can still be read again.
+    stream = ContentTypeStream([b'foo', b'bar'])
+    for _ in range(2):
+        assert [chunk async for chunk in stream.chunks(cache=False)] == [
+            b'foo', b'bar',
+        ]
+    assert stream._cache == []
+
+    # Just like a stream that has been cached completely.
+    stream = ContentTypeStream(iter([b'foo', b'bar', b'baz']))
+    assert await stream.body() == b'foobarbaz'
+    assert [chunk async for chunk in stream.chunks(cache=False)] == [
+        b'foo', b'bar', b'baz',
+    ]
+    assert await stream.body() == b'foobarbaz'
+
+
+@pytest.mark.asyncio
+async def test_stream_fetch_cancelled():
+    async def chunks():
+        for chunk in [b'foo', b'bar', b'baz']:
+            await asyncio.sleep(0.01)
+            yield chunk
+
+    stream = ContentTypeStream(chunks())
+    first = asyncio.ensure_future(stream.body())
+    second = asyncio.ensure_future(stream.body())
+    await asyncio.sleep(0.015)
+    first.cancel()
+    # The fetch that was cancelled ended the chunks, the other consumer
+    # raises instead of getting a truncated body.
+    with pytest.raises(ValueError) as exc_info:
+        await second
+    assert str(exc_info.value) == 'reading the stream was cancelled'
+    with pytest.raises(asyncio.CancelledError):
+        await first
@@ -9,6 +9,7 @@ from jackie.http import (
     Disconnect,
 )
 from jackie.http.stream import SendFile
+from jackie.http.wrappers import send_response
 
 
 @pytest.mark.asyncio
@@ -104,6 +105,29 @@ async def test_asgi_to_jackie():
     assert await response.body() == b'Hello, Jack!'
 
 
+@pytest.mark.asyncio
+async def test_asgi_to_jackie_query_string():
+    @asgi_to_jackie
+    async def view(scope, receive, send):
+        await send({'type': 'http.response.start', 'status': 200})
+        await send({
+            'type': 'http.response.body',
+            'body': scope['query_string'],
+        })
+
+    # The original query string is passed on as long as the query has not been
+    # accessed.
+    request = Request(query_string=b'b=2&a=1&a=%20')
+    response = await view(request)
+    assert await response.body() == b'b=2&a=1&a=%20'
+    assert request._query is None
+
+    request = Request(query_string=b'b=2&a=1&a=%20')
+    request.query.appendlist('c', '3')
+    response = await view(request)
+    assert await response.body() == b'b=2&a=1&a=+&c=3'
+
+
 def test_double_wrap():
     async def app(scope, receive, send):
         pass
@@ -811,6 +835,40 @@ async def test_jackie_to_asgi_send_file():
         await task
 
 
+@pytest.mark.asyncio
+async def test_jackie_to_asgi_send_file_range():
+    with tempfile.NamedTemporaryFile(suffix='.txt') as f:
+        f.write(b'foobar')
+        f.flush()
+
+        @jackie_to_asgi
+        async def app(request):
+            return Response(file=f.name)
+
+        output_queue = asyncio.Queue()
+        scope = {
+            'type': 'http',
+            'method': 'GET',
+            'path': '/',
+            'query_string': b'',
+            'headers': [(b'Range', b'bytes=1-2')],
+            'extensions': {'http.response.zerocopysend': {}},
+        }
+        await app(scope, asyncio.Queue().get, output_queue.put)
+
+        message = await output_queue.get()
+        assert message['type'] == 'http.response.start'
+        assert message['status'] == 206
+        assert (b'content-range', b'bytes 1-2/6') in message['headers']
+
+        message = await output_queue.get()
+        assert message['type'] == 'http.response.zerocopysend'
+        assert message['file'].name == f.name
+        assert message['offset'] == 1
+        assert message['count'] == 2
+        message['file'].close()
+
+
 @pytest.mark.asyncio
 async def test_asgi_to_jackie_send_file():
     with tempfile.NamedTemporaryFile(suffix='.txt') as f:
@@ -843,3 +901,128 @@ async def test_asgi_to_jackie_send_file():
 
         response = await view(Request(query={'size': 3}))
         assert await response.body() == b'foo'
+
+
+@pytest.mark.asyncio
+async def test_send_response_does_not_retain_chunks():
+    async def chunks():
+        for _ in range(3):
+            # Nothing has been retained from the chunks that were sent.
+            assert response._cache == []
+            yield b'foo'
+
+    response = Response(body=chunks())
+    messages = []
+
+    async def send(message):
+        messages.append(message)
+
+    scope = {'type': 'http', 'method': 'GET', 'headers': []}
+    await send_response(response, scope, send)
+    assert [message.get('body') for message in messages] == [
+        None, b'foo', b'foo', b'foo', b'',
+    ]
+    assert response._cache == []
+
+
+@pytest.mark.asyncio
+async def test_send_response_coalesce_chunks():
+    with tempfile.NamedTemporaryFile(suffix='.txt') as f:
+        f.write(b'file')
+        f.flush()
+
+        async def chunks():
+            for chunk in [b'a', b'bc', b'def', b'ghij', b'klmnopqrstu']:
+                yield chunk
+            yield SendFile(f.name)
+            yield b'v'
+            await asyncio.sleep(0.05)
+            yield b'w'
+
+        response = Response(body=chunks(), buffer_size=4, buffer_delay=0.01)
+        messages = []
+
+        async def send(message):
+            messages.append(message)
+
+        scope = {
+            'type': 'http',
+            'method': 'GET',
+            'headers': [],
+            'extensions': {'http.response.zerocopysend': {}},
+        }
+        await send_response(response, scope, send)
+        assert [
+            message.get('body', message['type'])
+            for message in messages[1:]
+        ] == [
+            b'abcdef', b'ghij', b'klmnopqrstu', 'http.response.zerocopysend',
+            b'v', b'w', b'',
+        ]
+        messages[4]['file'].close()
+
+
+def test_response_buffer_defaults(monkeypatch):
+    assert Response().buffer_size == 0
+    monkeypatch.setattr(Response, 'buffer_size', 1024)
+    assert Response().buffer_size == 1024
+    assert Response(buffer_size=16).buffer_size == 16
+
+
+@pytest.mark.asyncio
+async def test_send_response_twice():
+    with tempfile.NamedTemporaryFile(suffix='.txt') as f:
+        f.write(b'file')
+        f.flush()
+
+        responses = {
+            '/text': Response(text='text'),
+            '/file': Response(file=f.name),
+        }
+
+        @jackie_to_asgi
+        async def app(request):
+            return responses[request.path]
+
+        async def receive():
+            return {'type': 'http.request', 'body': b'', 'more_body': False}
+
+        for path, body in [('/text', b'text'), ('/file', b'file')]:
+            for _ in range(2):
+                messages = []
+
+                async def send(message):
+                    messages.append(message)
+
+                await app({
+                    'type': 'http',
+                    'method': 'GET',
+                    'path': path,
+                    'query_string': b'',
+                    'headers': [],
+                }, receive, send)
+                assert messages[0]['status'] == 200
+                assert b''.join(
+                    message['body'] for message in messages[1:]
+                ) == body
+
+
+@pytest.mark.asyncio
+async def test_send_response_twice_stream():
+    async def chunks():
+        yield b'foo'
+
+    response = Response(body=chunks())
+    messages = []
+
+    async def send(message):
+        messages.append(message)
+
+    scope = {'type': 'http', 'method': 'GET', 'headers': []}
+    await send_response(response, scope, send)
+    messages.clear()
+    # A streamed body is not kept, so sending it again fails before anything
+    # is sent.
+    with pytest.raises(ValueError):
+        await send_response(response, scope, send)
+    assert messages == []
@@ -63,3 +63,11 @@ def test_add_matchers():
 
     with pytest.raises(TypeError):
         matcher = Matcher('foo') + 'bar'
+
+
+def test_reverse_added_matchers():
+    matcher = Matcher('foo/<key>/') + Matcher('<value:int>/bar')
+
+    assert matcher.reverse(key='baz', value=123) == 'foo/baz/123/bar'
+    with pytest.raises(KeyError):
+        matcher.reverse(key='baz')
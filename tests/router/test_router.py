@@ -3,7 +3,7 @@ import asyncio
 import pytest
 
 from jackie.router import Router
-from jackie.http import asgi_to_jackie, Request, Response
+from jackie.http import asgi_to_jackie, jackie_to_asgi, Request, Response
 from jackie.http.exceptions import Disconnect
 
 
@@ -538,3 +538,394 @@ def test_reverse():
         app.reverse('unknown')
     with pytest.raises(ValueError):
         app.reverse('user:unknown')
+
+
+@pytest.mark.asyncio
+async def test_compiled_first_match():
+    router = Router()
+
+    @router.get('/item/<key>/')
+    async def item_detail(request, key):
+        return Response(text=f'detail {key}')
+
+    @router.get('/item/new/')
+    async def item_new(request):
+        return Response(text='new')
+
+    @router.post('/item/new/')
+    async def item_create(request):
+        return Response(text='create')
+
+    sub_router = Router()
+
+    @sub_router.get('<key:int>/')
+    async def sub_detail(request, key):
+        return Response(text=f'sub {key}')
+
+    router.include('/sub/', sub_router)
+
+    @router.get('/sub/<key>/')
+    async def sub_fallback(request, key):
+        return Response(text=f'fallback {key}')
+
+    for i in range(200):
+        router.get(f'/static/{i}/', item_new)
+        router.get(f'/dynamic/{i}/<key>/', item_detail)
+
+    view = asgi_to_jackie(router.compile())
+
+    response = await view(Request(method='GET', path='/item/new/'))
+    assert await response.text() == 'detail new'
+
+    response = await view(Request(method='POST', path='/item/new/'))
+    assert await response.text() == 'create'
+
+    response = await view(Request(method='PUT', path='/item/new/'))
+    assert response.status == 405
+    assert response.headers['Allow'] == 'GET, POST'
+
+    response = await view(Request(method='GET', path='/sub/123/'))
+    assert await response.text() == 'sub 123'
+
+    response = await view(Request(method='GET', path='/sub/foo/'))
+    assert await response.text() == 'fallback foo'
+
+    response = await view(Request(method='POST', path='/sub/123/'))
+    assert response.status == 405
+    assert response.headers['Allow'] == 'GET'
+
+    response = await view(Request(method='GET', path='/static/199/'))
+    assert await response.text() == 'new'
+
+    response = await view(Request(method='GET', path='/dynamic/199/foo/'))
+    assert await response.text() == 'detail foo'
+
+    response = await view(Request(method='GET', path='/unknown/'))
+    assert response.status == 404
+
+    response = await view(Request(method='FOO', path='/item/new/'))
+    assert response.status == 405
+    assert response.headers['Allow'] == 'GET, POST'
+
+    @sub_router.get('<key>/')
+    async def sub_other(request, key):
+        return Response(text=f'sub other {key}')
+
+    @router.get('/added/')
+    async def added(request):
+        return Response(text='added')
+
+    response = await view(Request(method='GET', path='/sub/foo/'))
+    assert await response.text() == 'sub other foo'
+
+    response = await view(Request(method='GET', path='/added/'))
+    assert await response.text() == 'added'
+
+
+@pytest.mark.asyncio
+async def test_compiled_trie():
+    router = Router()
+
+    @router.get('/<a>/<b:int>/')
+    async def int_view(request, a, b):
+        return Response(text=f'int {a} {b}')
+
+    @router.get('/a/<x>/')
+    async def a_view(request, x):
+        return Response(text=f'a {x}')
+
+    @router.get('/b<x>/c/')
+    async def b_prefix_view(request, x):
+        return Response(text=f'b prefix {x}')
+
+    for i in range(1000):
+        router.get(f'/s{i}/<x>/', a_view)
+
+    @router.get('/<a>/<b>/')
+    async def any_view(request, a, b):
+        return Response(text=f'any {a} {b}')
+
+    view = asgi_to_jackie(router.compile())
+
+    response = await view(Request(method='GET', path='/a/1/'))
+    assert await response.text() == 'int a 1'
+
+    response = await view(Request(method='GET', path='/a/foo/'))
+    assert await response.text() == 'a foo'
+
+    response = await view(Request(method='GET', path='/bar/c/'))
+    assert await response.text() == 'b prefix ar'
+
+    response = await view(Request(method='GET', path='/bar/d/'))
+    assert await response.text() == 'any bar d'
+
+    response = await view(Request(method='GET', path='/s999/foo/'))
+    assert await response.text() == 'a foo'
+
+    response = await view(Request(method='GET', path='/s1000/foo/'))
+    assert await response.text() == 'any s1000 foo'
+
+    # The routes are keyed on their leading literal segments, so a path is
+    # only matched against the routes that share its prefix.
+    _, (children, _) = router._index['GET']
+    children, regex = children['']
+    assert len(regex.groupindex) == 3
+    _, regex = children['s999']
+    assert len(regex.groupindex) == 1
+
+
+@pytest.mark.asyncio
+async def test_compiled_no_view_without_scan(monkeypatch):
+    async def text_view(request, **params):
+        return Response(text=request.path)
+
+    router = Router()
+    for i in range(100):
+        router.get(f'/s{i}/<x:int>/', text_view)
+    router.post('/s0/new/', text_view)
+    router.websocket('/s1/<x:int>/', text_view)
+    router.include('/sub/', Router().get('<x:int>/', text_view))
+    view = asgi_to_jackie(router)
+
+    def scan_routes(*args):
+        raise AssertionError('routes are scanned')
+
+    monkeypatch.setattr(router, '_scan_routes', scan_routes)
+
+    response = await view(Request(method='GET', path='/unknown/'))
+    assert response.status == 404
+
+    response = await view(Request(method='PUT', path='/s0/new/'))
+    assert response.status == 405
+    assert response.headers['Allow'] == 'POST'
+
+    response = await view(Request(method='POST', path='/s1/1/'))
+    assert response.status == 405
+    assert response.headers['Allow'] == 'GET, WEBSOCKET'
+
+
+@pytest.mark.asyncio
+async def test_include_miss_keeps_path():
+    async def text_view(request):
+        return Response(text=request.path)
+
+    router = Router()
+    router.include('/c', Router().get('/d', text_view))
+    router.include('', Router().get('/c', text_view))
+    view = asgi_to_jackie(router)
+
+    # The include of /c does not find a view, the path that is matched
+    # against the next include should still be the full path.
+    response = await view(Request(method='GET', path='/c'))
+    assert response.status == 200
+    assert await response.text() == '/c'
+
+
+@pytest.mark.asyncio
+async def test_middleware_chain_cache():
+    router = Router()
+    sub_router = Router()
+    router.include('/sub/', sub_router)
+
+    @sub_router.get('<param>/')
+    async def param_view(request, param):
+        return Response(text=param)
+
+    calls = []
+
+    def make_middleware(name):
+        def middleware(get_response):
+            calls.append(name)
+
+            async def view(request):
+                response = await get_response(request)
+                return Response(text=f'{name}({await response.text()})')
+            return view
+        return middleware
+
+    router.middleware(make_middleware('outer'))
+    sub_router.middleware(make_middleware('inner'))
+    sub_router.middleware(make_middleware('factory'), cache=False)
+
+    view = asgi_to_jackie(router)
+
+    response = await view(Request('/sub/foo/'))
+    assert await response.text() == 'outer(inner(factory(foo)))'
+    response = await view(Request('/sub/bar/'))
+    assert await response.text() == 'outer(inner(factory(bar)))'
+    assert calls == ['factory', 'inner', 'outer', 'factory', 'inner', 'outer']
+
+    calls.clear()
+    sub_router.middleware(make_middleware('cached'))
+
+    response = await view(Request('/sub/foo/'))
+    assert await response.text() == 'outer(inner(factory(cached(foo))))'
+    response = await view(Request('/sub/bar/'))
+    assert await response.text() == 'outer(inner(factory(cached(bar))))'
+    assert calls == [
+        'cached', 'factory', 'inner', 'outer', 'factory', 'inner', 'outer',
+    ]
+
+    response = await view(Request('/other/'))
+    assert await response.text() == 'outer(Not Found)'
+    calls.clear()
+    response = await view(Request('/other/'))
+    assert await response.text() == 'outer(Not Found)'
+    assert calls == []
+
+
+@pytest.mark.asyncio
+async def test_asgi_view_gets_original_scope():
+    router = Router()
+
+    @router.get('/asgi/<param>/', name='asgi')
+    @asgi_to_jackie
+    async def asgi_view(scope, receive, send):
+        await send({
+            'type': 'http.response.start',
+            'status': 200,
+            'headers': [],
+        })
+        await send({
+            'type': 'http.response.body',
+            'body': (
+                f'{scope["root_path"]} {scope["jackie.router"]["name"]} '
+                f'{scope["jackie.router"]["params"]["param"]}'
+            ).encode(),
+        })
+
+    @router.get('/jackie/<param>/', name='jackie')
+    async def jackie_view(request, param):
+        return Response(text=f'{request.view_name} {param}')
+
+    for path, body in [
+        ('/asgi/foo/', b'/root asgi foo'),
+        ('/jackie/foo/', b'jackie foo'),
+    ]:
+        input_queue = asyncio.Queue()
+        output_queue = asyncio.Queue()
+
+        scope = {
+            'type': 'http',
+            'method': 'GET',
+            'path': path,
+            'root_path': '/root',
+            'query_string': b'',
+            'headers': [],
+        }
+        task = asyncio.ensure_future(
+            router(scope, input_queue.get, output_queue.put)
+        )
+
+        message = await output_queue.get()
+        assert message['type'] == 'http.response.start'
+        assert message['status'] == 200
+        message = await output_queue.get()
+        assert message['body'] == body
+        await task
+
+
+@pytest.mark.asyncio
+async def test_resolve_cache():
+    router = Router(cache_size=2)
+    sub_router = Router()
+    router.include('/sub/', sub_router)
+
+    @router.get('/foo/')
+    async def foo(request):
+        return Response(text='foo')
+
+    @router.get('/bar/<param>/')
+    async def bar(request, param):
+        return Response(text=param)
+
+    @router.get('/baz/<param:int>/', cache=False)
+    async def baz(request, param):
+        return Response(text=str(param))
+
+    @sub_router.get('<param>/')
+    async def sub(request, param):
+        return Response(text=f'sub {param}')
+
+    view = asgi_to_jackie(router)
+
+    async def get(path):
+        response = await view(Request(path))
+        return await response.text()
+
+    assert router.cache_info() == (0, 0, 0, 2, 0)
+
+    assert await get('/foo/') == 'foo'
+    assert await get('/foo/') == 'foo'
+    assert router.cache_info() == (1, 1, 0, 2, 1)
+
+    assert await get('/bar/a/') == 'a'
+    assert await get('/sub/b/') == 'sub b'
+    assert router.cache_info() == (1, 3, 1, 2, 2)
+
+    assert await get('/sub/b/') == 'sub b'
+    assert await get('/bar/a/') == 'a'
+    assert router.cache_info() == (3, 3, 1, 2, 2)
+
+    assert await get('/baz/1/') == '1'
+    assert await get('/baz/1/') == '1'
+    assert await get('/unknown/') == 'Not Found'
+    assert await get('/unknown/') == 'Not Found'
+    assert router.cache_info() == (3, 7, 1, 2, 2)
+
+    @sub_router.get('<param>/')
+    async def sub_other(request, param):
+        return Response(text=f'sub other {param}')
+
+    @sub_router.middleware
+    def prefix_middleware(get_response):
+        async def view(request):
+            response = await get_response(request)
+            return Response(text='prefix ' + await response.text())
+        return view
+
+    assert router.cache_info().currsize == 0
+    assert await get('/sub/b/') == 'prefix sub b'
+
+
+def test_reverse_templates():
+    router = Router()
+    sub_router = Router()
+
+    router.include('/a/', sub_router)
+    router.include('/b/<key>/', sub_router, name='b')
+    router.get('/c/<path:path>', name='c')(post_list)
+    router.get('/c/other/<path:path>', name='c')(post_list)
+
+    assert router.reverse('c', path='foo/bar') == '/c/foo/bar'
+    with pytest.raises(ValueError):
+        router.reverse('sub')
+
+    sub_router.get('<value:int>/', name='sub')(post_list)
+
+    assert router.reverse('sub', value=1) == '/a/1/'
+    assert router.reverse('b:sub', key='foo', value=1) == '/b/foo/1/'
+    with pytest.raises(KeyError):
+        router.reverse('b:sub', value=1)
+
+
+@pytest.mark.asyncio
+async def test_asgi_middleware_keeps_params():
+    def asgi_middleware(app):
+        async def wrapped_app(scope, receive, send):
+            await app(scope, receive, send)
+        return wrapped_app
+
+    router = Router()
+    router.middleware(
+        lambda view: asgi_to_jackie(asgi_middleware(jackie_to_asgi(view)))
+    )
+
+    @router.get('/x/<id:int>')
+    async def x_view(request, id):
+        return Response(text=str(id))
+
+    view = asgi_to_jackie(router)
+    response = await view(Request(path='/x/5'))
+    assert response.status == 200
+    assert await response.text() == '5'
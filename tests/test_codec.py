@@ -0,0 +1,52 @@
+import json
+
+import pytest
+
+from jackie.codec import JSONCodec, json_codec
+from jackie.http import Request, Response, Socket
+
+
+def test_json_codec():
+    codec = JSONCodec()
+    assert codec.encode({'foo': 'bar'}) == b'{"foo": "bar"}'
+    assert codec.encode_text({'foo': 'bar'}) == '{"foo": "bar"}'
+    assert codec.decode(b'{"foo": "bar"}') == {'foo': 'bar'}
+    assert codec.decode('{"foo": "bar"}') == {'foo': 'bar'}
+
+    codec.configure(
+        dumps=lambda value: json.dumps(value, separators=(',', ':')).encode(),
+    )
+    assert codec.encode({'foo': 'bar'}) == b'{"foo":"bar"}'
+    assert codec.encode_text({'foo': 'bar'}) == '{"foo":"bar"}'
+
+
+@pytest.fixture
+def orjson_codec():
+    orjson = pytest.importorskip('orjson')
+    json_codec.configure(dumps=orjson.dumps, loads=orjson.loads)
+    yield
+    json_codec.configure()
+
+
+@pytest.mark.asyncio
+async def test_json_codec_orjson(orjson_codec):
+    response = Response(json={'foo': 'bar'})
+    assert await response.body() == b'{"foo":"bar"}'
+    assert await response.json() == {'foo': 'bar'}
+
+    request = Request(json=[1, 2, 3])
+    assert await request.body() == b'[1,2,3]'
+    assert await request.json() == [1, 2, 3]
+
+    sent = []
+
+    async def send(message):
+        sent.append(message)
+
+    async def receive():
+        return b'{"foo":"bar"}'
+
+    socket = Socket(accept=None, close=None, receive=receive, send=send)
+    await socket.send_json({'foo': 'bar'})
+    assert sent == ['{"foo":"bar"}']
+    assert await socket.receive_json() == {'foo': 'bar'}
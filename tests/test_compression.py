@@ -0,0 +1,222 @@
+import asyncio
+import gzip
+import zlib
+
+import pytest
+
+from jackie import compression
+from jackie.client import Client
+from jackie.compression import compress
+from jackie.http import Response
+from jackie.router import Router
+
+
+TEXT = 'Hello, World! ' * 100
+
+
+@pytest.fixture
+def app():
+    app = Router()
+    app.middleware(compress)
+
+    @app.get('/text')
+    async def text(request):
+        return Response(text=TEXT)
+
+    @app.get('/small')
+    async def small(request):
+        return Response(text='Hello, World!')
+
+    @app.get('/stream')
+    async def stream(request):
+        async def chunks():
+            for _ in range(100):
+                yield b'Hello, World! '
+        return Response(body=chunks(), content_type='text/plain')
+
+    @app.get('/small-stream')
+    async def small_stream(request):
+        async def chunks():
+            yield b'Hello, '
+            yield b'World!'
+        return Response(body=chunks(), content_type='text/plain')
+
+    @app.get('/binary')
+    async def binary(request):
+        return Response(body=b'\0' * 2000, content_type='image/png')
+
+    @app.get('/event-stream')
+    async def event_stream(request):
+        return Response(body=b'data: x\n\n' * 200, headers={
+            'Content-Type': 'text/event-stream',
+        })
+
+    @app.get('/encoded')
+    async def encoded(request):
+        return Response(text=TEXT, headers={'Content-Encoding': 'identity'})
+
+    @app.get('/not-found')
+    async def not_found(request):
+        return Response(status=404, text=TEXT)
+
+    @app.get('/etag')
+    async def etag(request):
+        return Response(text=TEXT, headers={
+            'ETag': '"abc"',
+            'Vary': 'Cookie',
+        })
+
+    return app
+
+
+@pytest.mark.asyncio
+async def test_compress_gzip(app):
+    client = Client(app)
+    response = await client.get('/text', headers={'Accept-Encoding': 'gzip'})
+    assert response.status == 200
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert response.headers['Vary'] == 'Accept-Encoding'
+    assert 'Content-Length' not in response.headers
+    body = await response.body()
+    assert len(body) < len(TEXT)
+    assert gzip.decompress(body) == TEXT.encode()
+
+
+@pytest.mark.asyncio
+async def test_compress_deflate(app):
+    client = Client(app)
+    response = await client.get('/stream', headers={
+        'Accept-Encoding': 'deflate',
+    })
+    assert response.headers['Content-Encoding'] == 'deflate'
+    assert zlib.decompress(await response.body()) == TEXT.encode()
+
+
+@pytest.mark.asyncio
+async def test_compress_negotiate(app, monkeypatch):
+    monkeypatch.setitem(compression.COMPRESSORS, 'br', None)
+    monkeypatch.setitem(compression.COMPRESSORS, 'zstd', None)
+    client = Client(app)
+    for accept_encoding, encoding in [
+        ('gzip, deflate, br', 'gzip'),
+        ('gzip;q=0.5, deflate', 'deflate'),
+        ('br', None),
+        ('*', 'gzip'),
+        ('*, gzip;q=0', 'deflate'),
+        ('identity', None),
+        ('', None),
+    ]:
+        response = await client.get('/text', headers={
+            'Accept-Encoding': accept_encoding,
+        })
+        assert response.headers.get('Content-Encoding') == encoding
+        assert response.headers['Vary'] == 'Accept-Encoding'
+        body = await response.body()
+        if encoding is None:
+            assert body == TEXT.encode()
+        else:
+            assert len(body) < len(TEXT)
+
+
+@pytest.mark.asyncio
+async def test_compress_skip(app):
+    client = Client(app)
+    for path, body in [
+        ('/small', b'Hello, World!'),
+        ('/binary', b'\0' * 2000),
+        ('/event-stream', b'data: x\n\n' * 200),
+        ('/encoded', TEXT.encode()),
+        ('/not-found', TEXT.encode()),
+    ]:
+        response = await client.get(path, headers={'Accept-Encoding': 'gzip'})
+        assert response.headers.get('Content-Encoding') in (None, 'identity')
+        assert await response.body() == body
+
+
+@pytest.mark.asyncio
+async def test_compress_small_stream(app):
+    client = Client(app)
+    response = await client.get('/small-stream', headers={
+        'Accept-Encoding': 'gzip',
+    })
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert gzip.decompress(await response.body()) == b'Hello, World!'
+
+
+@pytest.mark.asyncio
+async def test_compress_streaming():
+    app = Router()
+    app.middleware(compress)
+    event = asyncio.Event()
+
+    @app.get('/')
+    async def view(request):
+        async def chunks():
+            yield b'Hello, '
+            await event.wait()
+            yield b'World!'
+        return Response(body=chunks(), content_type='text/plain')
+
+    client = Client(app)
+    response = await asyncio.wait_for(client.get('/', headers={
+        'Accept-Encoding': 'gzip',
+    }), 1)
+    assert response.headers['Content-Encoding'] == 'gzip'
+    decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+    chunks = response.chunks().__aiter__()
+    chunk = await asyncio.wait_for(chunks.__anext__(), 1)
+    assert decompressor.decompress(chunk) == b'Hello, '
+    event.set()
+    data = b''
+    async for chunk in chunks:
+        data += decompressor.decompress(chunk)
+    assert data == b'World!'
+    assert decompressor.eof
+
+
+@pytest.mark.asyncio
+async def test_compress_etag(app):
+    client = Client(app)
+    response = await client.get('/etag', headers={'Accept-Encoding': 'gzip'})
+    assert response.headers['ETag'] == 'W/"abc"'
+    assert response.headers.getlist('Vary') == ['Cookie', 'Accept-Encoding']
+
+
+@pytest.mark.asyncio
+async def test_compress_options():
+    app = Router()
+    app.middleware(compress(min_size=10, thread_size=10, encodings=['gzip']))
+
+    @app.get('/')
+    async def view(request):
+        return Response(text='Hello, World!')
+
+    client = Client(app)
+    response = await client.get('/', headers={
+        'Accept-Encoding': 'deflate, gzip',
+    })
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert gzip.decompress(await response.body()) == b'Hello, World!'
+
+    response = await client.get('/', headers={'Accept-Encoding': 'deflate'})
+    assert 'Content-Encoding' not in response.headers
+
+
+@pytest.mark.asyncio
+async def test_compress_same_response_twice():
+    app = Router()
+    app.middleware(compress)
+    response = Response(text=TEXT)
+
+    @app.get('/text')
+    async def text(request):
+        return response
+
+    client = Client(app)
+    for _ in range(2):
+        compressed = await client.get('/text', headers={
+            'Accept-Encoding': 'gzip',
+        })
+        assert compressed.headers['Content-Encoding'] == 'gzip'
+        assert gzip.decompress(await compressed.body()) == TEXT.encode()
+    assert response.replayable
@@ -105,3 +105,67 @@ def test_headers():
         headers[1] = 'foo'
     with pytest.raises(TypeError):
         headers['foo'] = 1
+
+
+def test_headers_raw():
+    raw = [
+        (b'Content-Type', b'text/plain'),
+        (b'x-foo', b'1'),
+        (b'x-foo', b'2'),
+    ]
+    headers = Headers(raw)
+    assert headers._index is None
+    assert headers.raw_items() == raw
+    assert headers.raw_items() is not raw
+
+    assert headers['content-type'] == 'text/plain'
+    assert 'X-Foo' in headers
+    assert 'x-bar' not in headers
+    assert headers.getlist('x-foo') == ['1', '2']
+    assert list(headers.allitems()) == [
+        ('content-type', 'text/plain'),
+        ('x-foo', '1'),
+        ('x-foo', '2'),
+    ]
+    assert headers.raw_items() == raw
+
+    copy = Headers(headers)
+    copy['x-bar'] = '3'
+    assert headers.raw_items() == raw
+    assert copy.raw_items() == [
+        (b'content-type', b'text/plain'),
+        (b'x-foo', b'1'),
+        (b'x-foo', b'2'),
+        (b'x-bar', b'3'),
+    ]
+
+    headers = Headers(raw)
+    assert headers.poplist('x-foo') == '2'
+    assert headers.raw_items() == [
+        (b'content-type', b'text/plain'),
+        (b'x-foo', b'1'),
+    ]
+
+    headers = Headers([(b'foo', 'bar')])
+    assert headers._raw is None
+    assert headers.raw_items() == [(b'foo', b'bar')]
+
+
+def test_single_values():
+    multidict = MultiDict([('foo', [1, 2]), ('bar', 1)])
+    assert multidict['foo'] == [1, 2]
+    assert multidict.getlist('foo') == [[1, 2]]
+    multidict.appendlist('foo', 3)
+    assert multidict.getlist('foo') == [[1, 2], 3]
+    assert multidict.poplist('foo') == 3
+    assert multidict['foo'] == [1, 2]
+    assert list(multidict.allitems()) == [('foo', [1, 2]), ('bar', 1)]
+
+    copy = MultiDict(multidict, bar=2)
+    assert copy.getlist('bar') == [1, 2]
+    assert multidict.getlist('bar') == [1]
+    assert 'foo' in copy
+    assert 'baz' not in copy
+
+    with pytest.raises(AttributeError):
+        multidict.foo = 'bar'
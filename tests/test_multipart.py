@@ -293,3 +293,92 @@ async def test_serialize_items():
         b'2\n'
         b'--boundary--\n'
     )
+
+
+async def parse_stream(body, boundary, chunk_size=1, **kwargs):
+    chunks = [
+        body[index:index + chunk_size]
+        for index in range(0, len(body), chunk_size)
+    ]
+    return await multipart.parse_stream(chunks, boundary, **kwargs)
+
+
+@pytest.mark.asyncio
+async def test_parse_stream():
+    body = (
+        b'--boundary\r\n'
+        b'Content-Disposition: form-data; name=foo\r\n'
+        b'\r\n'
+        b'123\r\n'
+        b'--boundary\r\n'
+        b'Content-Disposition: form-data; name=bar\r\n'
+        b'\r\n'
+        b'\r\n'
+        b'--boundary\r\n'
+        b'Content-Disposition: form-data; name=baz; filename=baz.txt\r\n'
+        b'Content-Type: text/plain; charset=UTF-8\r\n'
+        b'\r\n'
+        b'line 1\r\n'
+        b'--boundary-but-not-really\r\n'
+        b'--boundary\r\n'
+        b'Content-Disposition: form-data; name=empty\r\n'
+        b'\r\n'
+        b'--boundary--\r\n'
+    )
+    for chunk_size in [1, 2, 3, 7, len(body)]:
+        data = await parse_stream(body, 'boundary', chunk_size, spool_size=4)
+        assert set(data) == {'foo', 'bar', 'baz', 'empty'}
+        assert data['foo'] == '123'
+        assert data['bar'] == ''
+        assert data['empty'] == ''
+        assert isinstance(data['baz'], multipart.File)
+        assert data['baz'].name == 'baz.txt'
+        assert data['baz'].content_type == 'text/plain'
+        assert data['baz'].content == (
+            b'line 1\r\n'
+            b'--boundary-but-not-really'
+        )
+        chunks = [
+            chunk async for chunk in data['baz'].chunks(chunk_size=10)
+        ]
+        assert chunks == [
+            b'line 1\r\n--', b'boundary-b', b'ut-not-rea', b'lly',
+        ]
+
+
+@pytest.mark.asyncio
+async def test_parse_stream_errors():
+    with pytest.raises(ValueError) as exc_info:
+        await parse_stream(b'blaat\n', 'boundary')
+    assert str(exc_info.value) == 'invalid form data: missing boundary'
+
+    with pytest.raises(ValueError) as exc_info:
+        await parse_stream(b'--boundary\nfoo: bar\n', 'boundary')
+    assert str(exc_info.value) == 'invalid form data: unexpected end of data'
+
+    with pytest.raises(ValueError) as exc_info:
+        await parse_stream(
+            b'--boundary\n'
+            b'Content-Disposition: form-data; name=foobar\n'
+            b'\n'
+            b'foobar\n'
+            b'--boundary',
+            'boundary',
+        )
+    assert str(exc_info.value) == 'invalid form data: unexpected end of data'
+
+    assert await parse_stream(b'--boundary--', 'boundary') == {}
+
+
+@pytest.mark.asyncio
+async def test_parse_binary():
+    content = (
+        b'\n\r\n\r\x00--boundary\r--boundary-\n--boundar\n--boundary \n' * 3
+    )
+    data = {'file': multipart.File('file.bin', 'image/png', content)}
+    body = b''.join([
+        chunk async for chunk in multipart.serialize(data, 'boundary')
+    ])
+    assert multipart.parse(body, 'boundary')['file'].content == content
+    data = await parse_stream(body, 'boundary', 5)
+    assert data['file'].content == content
@@ -1,10 +1,13 @@
 from datetime import datetime, timezone
+import random
+from types import MappingProxyType
 
 import pytest
 
 from jackie.parse import (
-    parse_content_disposition, parse_content_type, parse_cookies,
-    parse_set_cookie,
+    ParseCache, cache, cached_parse, fast_parse_content_type,
+    fast_parse_cookies, fast_parse_set_cookie, lex, parse_content_disposition,
+    parse_content_type, parse_cookies, parse_set_cookie, parse_token,
 )
 
 
@@ -184,3 +187,156 @@ def test_parse_set_cookie_same_site_none():
 def test_parse_set_cookie_same_site_invalid():
     with pytest.raises(ValueError):
         parse_set_cookie('cookie=123; SameSite=Invalid')
+
+
+def test_cached_parse():
+    calls = []
+
+    def parse(content):
+        calls.append(content)
+        return content.upper()
+
+    cache = {}
+    assert cached_parse(cache, parse, 'foo') == 'FOO'
+    assert cached_parse(cache, parse, 'foo') == 'FOO'
+    assert calls == ['foo']
+    assert cached_parse(cache, parse, 'bar') == 'BAR'
+    assert calls == ['foo', 'bar']
+
+
+FAST_PARSERS = [
+    (fast_parse_content_type, parse_content_type, [
+        'text/plain',
+        ' text/html ; charset=UTF-8 ',
+        'multipart/form-data; boundary="foo \\" bar"',
+        'application/json;charset=utf-8;foo=bar;foo=baz',
+    ], [
+        'text/plain;',
+        '"text"/plain',
+        'text / plain; charset',
+        'text/plain; charset="utf-8',
+        'text/plain; charset=utf-8 foo',
+        'text/plain foo',
+        '',
+    ]),
+    (fast_parse_cookies, parse_cookies, [
+        '',
+        '  ',
+        'foo=bar',
+        'foo=123; bar="foo \\" bar"; baz=qux;',
+        'foo = bar ;bar=baz',
+    ], [
+        ';',
+        'foo',
+        'foo=',
+        'foo=bar bar=baz',
+        'foo=bar;;',
+        'foo=abc==',
+        'foo="bar"baz',
+    ]),
+    (fast_parse_set_cookie, parse_set_cookie, [
+        'foo=bar',
+        'foo="bar baz"; Secure; HttpOnly',
+        'foo=bar; Expires=Wed, 21 Oct 2015 07:28:00 GMT',
+        'foo=bar; max-age=3600; domain=example.com; path=/foo/bar',
+        'foo=bar; Path=; Path="/foo bar"; SameSite=Lax',
+    ], [
+        'foo=bar;',
+        'foo=bar; Unknown',
+        'foo=bar; Secure=yes',
+        'foo=bar; Max-Age=-1',
+        'foo=bar; Max-Age=1_0',
+        'foo=bar; Expires=Thu, 21 Oct 2015 07:28:00 GMT',
+        'foo=bar; Expires=Wed, 32 Oct 2015 07:28:00 GMT',
+        'foo=bar; Path=/foo bar',
+        'foo=bar; Domain="a;b"',
+        'foo=bar; SameSite="Lax"',
+        'foo=bar; SameSite=Same-Site',
+    ]),
+]
+
+
+def parse_generic(parse, content):
+    content = list(lex(content)), 0, frozenset()
+    content, result = parse(content)
+    parse_token(content, 'end')
+    return result
+
+
+def check_fast_parse(fast_parse, parse, content):
+    # The fast parser may give up on any value but when it does give a result
+    # it has to be the same as the result of the generic parser.
+    result = fast_parse(content)
+    if result is not None:
+        assert result == parse_generic(parse, content), content
+    return result
+
+
+@pytest.mark.parametrize('fast_parse,parse,fast,slow', FAST_PARSERS)
+def test_fast_parse(fast_parse, parse, fast, slow):
+    for content in fast:
+        assert check_fast_parse(fast_parse, parse, content) is not None
+    for content in slow:
+        assert check_fast_parse(fast_parse, parse, content) is None
+
+
+@pytest.mark.parametrize('fast_parse,parse,fast,slow', FAST_PARSERS)
+def test_fast_parse_random(fast_parse, parse, fast, slow):
+    rng = random.Random(0)
+    alphabet = [' ', '\t', '"', '\\', ';', '=', '/', ',', ':', 'a', '1']
+    for content in fast + slow:
+        for _ in range(200):
+            chars = list(content)
+            for _ in range(rng.randint(1, 3)):
+                index = rng.randint(0, len(chars))
+                if chars and rng.random() < 0.5:
+                    del chars[min(index, len(chars) - 1)]
+                else:
+                    chars.insert(index, rng.choice(alphabet))
+            content = ''.join(chars)
+            check_fast_parse(fast_parse, parse, content)
+
+
+def test_parse_cache():
+    parse_cache = ParseCache(size=2, max_length=10)
+    calls = []
+
+    def parse(content):
+        calls.append(content)
+        return {'value': [content]}
+
+    result = parse_cache.get(parse, 'foo')
+    assert result == {'value': ('foo',)}
+    assert isinstance(result, MappingProxyType)
+    assert parse_cache.get(parse, 'foo') is result
+    parse_cache.get(parse, 'bar')
+    parse_cache.get(parse, 'baz')
+    parse_cache.get(parse, 'foo')
+    assert calls == ['foo', 'bar', 'baz', 'foo']
+    assert parse_cache.info() == (1, 4, 2, 2, 2)
+
+    parse_cache.get(parse, 'x' * 11)
+    parse_cache.get(parse, 'x' * 11)
+    assert parse_cache.info() == (1, 4, 2, 2, 2)
+
+    parse_cache.clear()
+    assert parse_cache.info() == (0, 0, 0, 2, 0)
+
+    parse_cache = ParseCache()
+    assert parse_cache.get(parse, 'foo') == {'value': ['foo']}
+    assert parse_cache.info() == (0, 0, 0, 0, 0)
+
+
+def test_parse_cache_parsers():
+    cache.configure(size=10)
+    try:
+        cookies = parse_cookies('foo=bar')
+        assert parse_cookies(b'foo=bar') is cookies
+        with pytest.raises(TypeError):
+            cookies['foo'] = 'baz'
+        with pytest.raises(ValueError):
+            parse_cookies('foo')
+        assert parse_content_type('text/plain') == ('text/plain', {})
+        assert cache.info() == (1, 3, 0, 10, 2)
+    finally:
+        cache.configure(size=0)
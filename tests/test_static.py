@@ -0,0 +1,231 @@
+import mimetypes
+import os
+
+import pytest
+
+from jackie.client import Client
+from jackie.http import Response
+from jackie.router import Router
+from jackie.static import Static
+
+
+@pytest.fixture
+def directory(tmp_path):
+    (tmp_path / 'public').mkdir()
+    (tmp_path / 'public' / 'hello.txt').write_bytes(b'Hello, World!')
+    (tmp_path / 'public' / 'big.txt').write_bytes(b'x' * 100)
+    (tmp_path / 'public' / 'app.js').write_bytes(b'js')
+    (tmp_path / 'public' / 'app.js.gz').write_bytes(b'gzip')
+    (tmp_path / 'public' / 'app.js.br').write_bytes(b'br')
+    (tmp_path / 'public' / 'sub').mkdir()
+    (tmp_path / 'public' / 'sub' / 'index.html').write_bytes(b'<html/>')
+    (tmp_path / 'secret.txt').write_bytes(b'secret')
+    os.symlink(tmp_path / 'secret.txt', tmp_path / 'public' / 'secret.txt')
+    return tmp_path / 'public'
+
+
+@pytest.fixture
+def client(directory):
+    app = Router()
+    app.include('/static', Static(directory, memory_size=50))
+
+    # Wrapped so that the client goes through ASGI where range and conditional
+    # requests are handled.
+    async def asgi_app(scope, receive, send):
+        await app(scope, receive, send)
+
+    return Client(asgi_app)
+
+
+@pytest.mark.asyncio
+async def test_static(client):
+    response = await client.get('/static/hello.txt')
+    assert response.status == 200
+    assert response.content_type == 'text/plain'
+    assert 'ETag' in response.headers
+    assert 'Last-Modified' in response.headers
+    assert await response.body() == b'Hello, World!'
+
+    response = await client.get('/static/sub/index.html')
+    assert response.status == 200
+    assert response.content_type == 'text/html'
+    assert await response.body() == b'<html/>'
+
+    response = await client.head('/static/hello.txt')
+    assert response.status == 200
+
+
+@pytest.mark.asyncio
+async def test_static_not_found(client):
+    for path in [
+        '/static/missing.txt',
+        '/static/sub',
+        '/static/sub/',
+        '/static/../secret.txt',
+        '/static/sub/../../secret.txt',
+        '/static/./hello.txt',
+        '/static/secret.txt',
+    ]:
+        response = await client.get(path)
+        assert response.status == 404
+
+
+@pytest.mark.asyncio
+async def test_static_fall_through(directory):
+    app = Router()
+    app.include('/static', Static(directory))
+
+    @app.get('/static/generated.txt')
+    async def generated(request):
+        return Response(text='generated')
+
+    @app.not_found
+    async def not_found(request):
+        return Response(status=404, text='custom')
+
+    client = Client(app)
+    response = await client.get('/static/hello.txt')
+    assert await response.body() == b'Hello, World!'
+
+    # Missing files are routed as if the static router had no route for them.
+    response = await client.get('/static/generated.txt')
+    assert response.status == 200
+    assert await response.text() == 'generated'
+
+    response = await client.get('/static/missing.txt')
+    assert response.status == 404
+    assert await response.text() == 'custom'
+
+    static = Static(directory)
+
+    @static.not_found
+    async def static_not_found(request):
+        return Response(status=404, text='static')
+
+    app.include('/other', static)
+    response = await client.get('/other/missing.txt')
+    assert response.status == 404
+    assert await response.text() == 'static'
+
+
+@pytest.mark.asyncio
+async def test_static_big_file(client):
+    response = await client.get('/static/big.txt')
+    assert response.status == 200
+    assert response.headers['Accept-Ranges'] == 'bytes'
+    assert await response.body() == b'x' * 100
+
+    response = await client.get('/static/big.txt', headers={
+        'Range': 'bytes=10-19',
+    })
+    assert response.status == 206
+    assert await response.body() == b'x' * 10
+
+
+@pytest.mark.asyncio
+async def test_static_not_modified(client):
+    response = await client.get('/static/hello.txt')
+    etag = response.headers['ETag']
+    response = await client.get('/static/hello.txt', headers={
+        'If-None-Match': etag,
+    })
+    assert response.status == 304
+    assert await response.body() == b''
+
+
+@pytest.mark.asyncio
+async def test_static_precompressed(client):
+    response = await client.get('/static/app.js')
+    assert response.headers['Vary'] == 'Accept-Encoding'
+    assert 'Content-Encoding' not in response.headers
+    assert await response.body() == b'js'
+
+    for accept_encoding, encoding, body in [
+        ('gzip, deflate, br', 'br', b'br'),
+        ('gzip', 'gzip', b'gzip'),
+        ('br;q=0, *', 'gzip', b'gzip'),
+    ]:
+        response = await client.get('/static/app.js', headers={
+            'Accept-Encoding': accept_encoding,
+        })
+        assert response.content_type == mimetypes.guess_type('app.js')[0]
+        assert response.headers['Content-Encoding'] == encoding
+        assert await response.body() == body
+
+    response = await client.get('/static/app.js', headers={
+        'Accept-Encoding': 'identity',
+    })
+    assert 'Content-Encoding' not in response.headers
+
+
+@pytest.mark.asyncio
+async def test_static_cache(directory):
+    static = Static(directory)
+    client = Client(static)
+
+    response = await client.get('/hello.txt')
+    assert await response.body() == b'Hello, World!'
+
+    (directory / 'hello.txt').write_bytes(b'Goodbye, World!')
+    response = await client.get('/hello.txt')
+    assert await response.body() == b'Hello, World!'
+
+    static.cache_ttl = 0
+    response = await client.get('/hello.txt')
+    assert await response.body() == b'Goodbye, World!'
+
+    static = Static(directory, cache_size=1)
+    client = Client(static)
+    await client.get('/hello.txt')
+    await client.get('/app.js')
+    assert list(static._files) == ['app.js']
+
+
+@pytest.mark.asyncio
+async def test_static_cache_revalidate(directory):
+    static = Static(directory, cache_ttl=0)
+    client = Client(static)
+
+    response = await client.get('/hello.txt')
+    assert await response.body() == b'Hello, World!'
+
+    # The file is only read again when its inode, mtime or size changed.
+    path = directory / 'hello.txt'
+    stat = os.stat(path)
+    path.write_bytes(b'Hello, Earth!')
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+    response = await client.get('/hello.txt')
+    assert await response.body() == b'Hello, World!'
+
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1000))
+    response = await client.get('/hello.txt')
+    assert await response.body() == b'Hello, Earth!'
+
+
+@pytest.mark.asyncio
+async def test_static_cache_memory_size(directory):
+    (directory / 'a.txt').write_bytes(b'a' * 100)
+    (directory / 'b.txt').write_bytes(b'b' * 100)
+    (directory / 'c.txt').write_bytes(b'c' * 100)
+    static = Static(directory, cache_memory_size=250)
+    client = Client(static)
+
+    await client.get('/a.txt')
+    await client.get('/b.txt')
+    assert list(static._files) == ['a.txt', 'b.txt']
+    assert static._memory == 200
+
+    # The least recently used file is dropped to make room.
+    await client.get('/a.txt')
+    response = await client.get('/c.txt')
+    assert await response.body() == b'c' * 100
+    assert list(static._files) == ['a.txt', 'c.txt']
+    assert static._memory == 200
+
+    # Files that are too big for the cache are still served.
+    static.cache_memory_size = 50
+    static.cache_ttl = 0
+    response = await client.get('/b.txt')
+    assert await response.body() == b'b' * 100
+    assert list(static._files) == []
+    assert static._memory == 0